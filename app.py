@@ -1,21 +1,95 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, session
-from sqlalchemy import func, text  # type: ignore
+from flask import Flask, Request, Response, render_template, request, redirect, url_for, jsonify, flash, session, g, send_file
+from sqlalchemy import func, inspect, literal, select, text, tuple_, union_all  # type: ignore
+from sqlalchemy.schema import CreateIndex  # type: ignore
+from contextlib import contextmanager
 from functools import wraps
+import base64
 import hashlib
 import os
 import json
-from datetime import datetime
-from werkzeug.utils import secure_filename
-from models import db, Project, Feedback, ProjectReport
+import re
+import time
+from datetime import datetime, date
+from markupsafe import Markup, escape
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from werkzeug.utils import safe_join
+from models import db, Project, Feedback, ProjectReport, recount_project_reports
+from models import AnnualBudget, BudgetRollup, rebuild_budget_rollup
+from models import register_upload, lock_upload, release_report_images, UPLOAD_STATIC_PREFIX
+from models import SEARCH_CONFIG, project_search_vector, report_search_vector, report_feed_key
+import budget_loader
+import exporter
+import images
+import instrumentation
+import metrics
+import storage
+import thumbnails
+import upload_gc
+import uploads
+from cache import ResultCache
 
 # File upload configuration
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'images', 'projects')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 
+# Where uploads are kept: UPLOAD_FOLDER, or a bucket shared by all app nodes
+# (UPLOAD_STORAGE=s3, see storage.py)
+upload_storage = storage.from_env(UPLOAD_FOLDER)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Request body limits of the routes that accept uploads, by endpoint. Other
+# routes get MAX_CONTENT_LENGTH.
+MB = 1024 * 1024
+UPLOAD_LIMITS = {
+    'feedback': 8 * MB,
+    'admin': 16 * MB,
+    'edit_project': 16 * MB,
+}
+
+class UploadRequest(Request):
+    """Request that streams uploaded files straight to disk, in upload storage's spool_root.
+
+    Bodies over the route's limit are refused from their Content-Length
+    before any of it is read (or once the limit is reached, for chunked
+    bodies), and each file is checked for an image signature as it arrives.
+    """
+
+    @property
+    def max_content_length(self):
+        return UPLOAD_LIMITS.get(self.endpoint) or super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        incoming = uploads.IncomingUpload(upload_storage.spool_root,
+                                          self.max_content_length or uploads.DEFAULT_MAX_BYTES)
+        # A file rejected mid-parse never reaches request.files, so close() tracks them all
+        self.__dict__.setdefault('incoming_uploads', []).append(incoming)
+        return incoming
+
+    def close(self):
+        super().close()
+        for incoming in self.__dict__.get('incoming_uploads', ()):
+            incoming.close()
+
+def save_upload(file):
+    """Store an uploaded image by content hash; returns its storage key.
+
+    The upload_blob row is added to the current transaction, so the caller
+    commits it together with the project or report that references it.
+    Until then the file is locked against garbage collection.
+    """
+    stored = uploads.store(file.stream, upload_storage, lock=lock_upload)
+    # Measured from the start of the request, so it includes receiving the body
+    started = g.get('request_started', time.perf_counter())
+    metrics.observe_upload(stored.size, time.perf_counter() - started)
+    register_upload(stored.filename, stored.size)
+    if stored.created:
+        # A known file already has its variants
+        images.process_upload(upload_storage, stored.filename)
+    return stored.filename
+
 # PostgreSQL Configuration for Local Development
 DB_USER = 'postgres'
 DB_PASSWORD = 'postgres'
@@ -24,9 +98,125 @@ DB_PORT = '5432'
 DB_NAME = 'govfunds'
 
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.secret_key = 'sikreto ni aldred'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = 86400  # 24 hours
+app.config['MAX_CONTENT_LENGTH'] = uploads.DEFAULT_MAX_BYTES
+
+@app.template_global()
+def upload_url(key):
+    """URL of a stored upload: a static file, a presigned bucket URL or /uploads/<key>"""
+    if not upload_storage.remote:
+        return url_for('static', filename=UPLOAD_STATIC_PREFIX + key)
+    if upload_storage.presign_seconds:
+        return upload_storage.presigned_url(key)
+    return url_for('upload_file', key=key)
+
+@app.template_global()
+def image_variant(static_path, variant):
+    """URL of a resized variant of a static image.
+
+    Uses the variant written by the upload pipeline when there is one, and
+    otherwise the /thumbnail endpoint, which resizes on first request.
+    """
+    if upload_storage.remote and static_path.startswith(UPLOAD_STATIC_PREFIX):
+        key = static_path[len(UPLOAD_STATIC_PREFIX):]
+        variant_key = images.variant_key(key, variant)
+        if upload_storage.cached_head(variant_key) is not None:
+            return upload_url(variant_key)
+        head = upload_storage.cached_head(key)
+        if head is not None:
+            if images.Image is None:
+                return upload_url(key)
+            # Content-addressed, but the original is rewritten once when its EXIF is removed
+            return url_for('thumbnail', filename=static_path[len('images/'):],
+                           w=images.VARIANTS[variant], v=int(head[1]))
+        # Not in the bucket: an image shipped in static/images/projects
+    path = images.variant_url(app.static_folder, static_path, variant)
+    if path != static_path or images.Image is None or not static_path.startswith('images/'):
+        return url_for('static', filename=path)
+    try:
+        # The version changes with the file, so the URL can be cached for good
+        version = int(os.stat(os.path.join(app.static_folder, static_path)).st_mtime)
+    except OSError:
+        return url_for('static', filename=static_path)
+    return url_for('thumbnail', filename=static_path[len('images/'):], w=images.VARIANTS[variant], v=version)
+
+thumbnail_cache = thumbnails.ThumbnailCache()
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+@app.route('/thumbnail/<path:filename>')
+def thumbnail(filename):
+    """static/images/<filename> resized to ?w= pixels wide, as ?format= (webp, jpeg, png)"""
+    image_format = request.args.get('format', 'webp')
+    try:
+        width = int(request.args.get('w', ''))
+    except ValueError:
+        width = None
+    if width not in thumbnails.WIDTHS or image_format not in thumbnails.FORMATS:
+        return jsonify({'error': f"w must be one of {', '.join(map(str, thumbnails.WIDTHS))} "
+                                 f"and format one of {', '.join(thumbnails.FORMATS)}"}), 400
+    
+    static_path = f"images/{filename}"
+    source = safe_join(os.path.join(app.static_folder, 'images'), filename)
+    remote_key = None
+    if source is not None and not os.path.isfile(source) and upload_storage.remote \
+            and static_path.startswith(UPLOAD_STATIC_PREFIX):
+        # An upload kept in the bucket, read through the local cache
+        remote_key = static_path[len(UPLOAD_STATIC_PREFIX):]
+        try:
+            source = upload_storage.fetch(remote_key)
+        except FileNotFoundError:
+            source = None
+        except Exception as e:
+            print(f"Error fetching upload {remote_key}: {e}")
+            return jsonify({'error': 'Image unavailable'}), 503
+    if source is None or not os.path.isfile(source):
+        return jsonify({'error': 'Image not found'}), 404
+    if images.Image is None:
+        return redirect(upload_url(remote_key) if remote_key else url_for('static', filename=static_path))
+    
+    try:
+        path = thumbnail_cache.get(source, width, image_format,
+                                   source_key=f"upload:{remote_key}" if remote_key else None)
+    except thumbnails.InvalidImage:
+        return jsonify({'error': 'Not an image'}), 404
+    except Exception as e:
+        print(f"Error generating thumbnail for {filename}: {e}")
+        return jsonify({'error': 'Thumbnail unavailable'}), 503
+    
+    # send_file hands the open file to the server's wsgi.file_wrapper, which
+    # gunicorn sends with sendfile(); USE_X_SENDFILE delegates to nginx instead
+    response = send_file(path, mimetype=thumbnails.FORMATS[image_format][1],
+                         max_age=THUMBNAIL_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+# Keys the upload store hands out: <sha256>.<ext> and variants/<sha256>.<ext>.<variant>.webp
+UPLOAD_KEY_PATTERN = re.compile(r'^(variants/)?[0-9a-f]{64}\.[a-z]+(\.[a-z]+\.webp)?$')
+# Originals are rewritten once when their metadata is removed; variants never change
+UPLOAD_MAX_AGE = 3600
+
+@app.route('/uploads/<path:key>')
+def upload_file(key):
+    """An upload kept in remote storage, served from the local read-through cache"""
+    if not UPLOAD_KEY_PATTERN.match(key):
+        return jsonify({'error': 'Image not found'}), 404
+    try:
+        path = upload_storage.fetch(key)
+    except FileNotFoundError:
+        return jsonify({'error': 'Image not found'}), 404
+    except Exception as e:
+        print(f"Error fetching upload {key}: {e}")
+        return jsonify({'error': 'Image unavailable'}), 503
+
+    variant = key.startswith(images.VARIANT_FOLDER + '/')
+    response = send_file(path, max_age=THUMBNAIL_MAX_AGE if variant else UPLOAD_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = variant
+    return response
 
 # Protected routes that require login
 PROTECTED_ROUTES = ['/admin']
@@ -39,6 +229,31 @@ def check_admin_access():
             flash('Please log in to access the admin panel.', 'warning')
             return redirect(url_for('login'))
 
+@app.before_request
+def start_upload_gc():
+    upload_collector.start()
+
+@app.before_request
+def parse_uploads():
+    """Read upload forms before the view, so a rejected file reaches upload_rejected()"""
+    if request.method != 'POST' or request.endpoint not in UPLOAD_LIMITS:
+        return
+    if request.endpoint != 'feedback' and not session.get('admin_user'):
+        # The view turns the request away without reading the body
+        return
+    request.files
+
+@app.errorhandler(RequestEntityTooLarge)
+@app.errorhandler(UnsupportedMediaType)
+def upload_rejected(e):
+    if request.endpoint not in UPLOAD_LIMITS:
+        return e
+    if isinstance(e, RequestEntityTooLarge):
+        flash(f"Uploads can be at most {request.max_content_length // MB} MB.", 'danger')
+    else:
+        flash(e.description, 'danger')
+    return redirect(url_for('projects' if request.endpoint == 'edit_project' else request.endpoint))
+
 # SQLAlchemy Configuration for PostgreSQL
 DB_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
 
@@ -55,33 +270,172 @@ except Exception as e:
 app.config['SQLALCHEMY_DATABASE_URI'] = DB_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool of each worker process. Under gunicorn's gthread worker each
+# thread holds at most one connection, so gunicorn.conf.py sets DB_POOL_SIZE to
+# the thread count; the overflow covers the JSON export thread.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 2)),
+    'pool_timeout': 10,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True,
+}
+
 # Initialize database
 db.init_app(app)
 
+# Per-request query stats: Server-Timing header, access log and slow-query log
+instrumentation.instrument(app, db)
+
+# Record row changes so sync_to_json only rewrites what changed
+exporter.track_changes(db.session)
+
+# Export JSON snapshots in the background, off the request path
+export_worker = exporter.ExportWorker(app)
+
+# Delete uploads no project or report uses any more, off the request path
+upload_collector = upload_gc.UploadCollector(app, upload_storage)
+
+# Key of the PostgreSQL advisory lock held while initializing the database
+INIT_LOCK_ID = 4810001
+
+@contextmanager
+def init_lock():
+    """Let one process at a time initialize the database.
+
+    Every worker that imports the app runs init_db(); the advisory lock makes
+    the others wait, then find the tables created and the data seeded.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+    with db.engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:id)"), {'id': INIT_LOCK_ID})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': INIT_LOCK_ID})
+
+# PostgreSQL extensions that indexes in models.py depend on
+EXTENSIONS = ['pg_trgm']
+
+def ensure_extensions():
+    """Create the extensions the schema needs (before any table or index)"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for name in EXTENSIONS:
+        db.session.execute(text(f"CREATE EXTENSION IF NOT EXISTS {name}"))
+    db.session.commit()
+
 # Initialize database on startup
 def init_db():
     """Initialize database tables and seed data if empty"""
     with app.app_context():
         try:
-            db.create_all()
-            print("✓ Database tables created/verified")
+            with init_lock():
+                ensure_extensions()
+                db.create_all()
+                print("✓ Database tables created/verified")
             
-            # Check if database is empty
-            project_count = Project.query.count()
+                upgrade_schema()
+                seed_budgets()
             
-            if project_count == 0:
-                print("→ Database is empty. Seeding from seed.sql...")
-                seed_from_sql()
-                print("✓ Database seeded successfully")
+                # Check if database is empty
+                project_count = Project.query.count()
+            
+                if project_count == 0:
+                    print("→ Database is empty. Seeding from seed.sql...")
+                    seed_from_sql()
+                    print("✓ Database seeded successfully")
                 
-                # Export to JSON after seeding
-                sync_to_json()
-                print("✓ Data exported to JSON files")
-            else:
-                print(f"✓ Database already populated with {project_count} projects")
+                    # seed.sql recreates the tables without secondary indexes
+                    upgrade_schema()
+                
+                    # Export to JSON after seeding
+                    sync_to_json(full=True)
+                    print("✓ Data exported to JSON files")
+                else:
+                    print(f"✓ Database already populated with {project_count} projects")
         except Exception as e:
             print(f"Error during database initialization: {e}")
 
+# Columns added to existing tables after their first release. create_all()
+# only creates missing tables, so these are added here when absent.
+SCHEMA_UPGRADES = {
+    'project': [
+        ('report_count', 'INTEGER NOT NULL DEFAULT 0'),
+        ('unresolved_report_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ],
+}
+
+# Indexes dropped from models.py, removed from databases created before then
+RETIRED_INDEXES = [
+    'ix_project_name',  # superseded by ix_project_name_trgm for the picker
+    'ix_project_sector',  # /api/budget_data reads budget_rollup instead
+    'ix_project_report_project_created',  # replaced by ix_project_report_feed_key
+    'ix_project_report_feed',  # replaced by ix_project_report_feed_key
+]
+
+def upgrade_schema():
+    """Add missing columns and indexes to an existing database"""
+    inspector = inspect(db.engine)
+    added = []
+    for table, columns in SCHEMA_UPGRADES.items():
+        existing = {column['name'] for column in inspector.get_columns(table)}
+        for name, ddl in columns:
+            if name not in existing:
+                db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+                added.append(f"{table}.{name}")
+    if added:
+        db.session.commit()
+        print(f"✓ Added columns: {', '.join(added)}")
+        
+        # Backfill the report counters for existing projects
+        recount_project_reports()
+        db.session.commit()
+        print("✓ Project report counters recomputed")
+    
+    # Drop indexes models.py no longer declares
+    for name in RETIRED_INDEXES:
+        db.session.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    
+    # Create any index declared in models.py that the database lacks
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing and index_applies(index):
+                db.session.execute(CreateIndex(index, if_not_exists=True))
+                created.append(index.name)
+    db.session.commit()
+    if created:
+        print(f"✓ Created indexes: {', '.join(created)}")
+    
+    # Fill the budget rollup for projects that predate it or were loaded by SQL
+    if db.session.query(BudgetRollup).first() is None and db.session.query(Project).first() is not None:
+        rebuild_budget_rollup()
+        db.session.commit()
+        print("✓ Budget rollup rebuilt")
+
+def index_applies(index):
+    """False for an index declared with ddl_if() for another database"""
+    condition = index._ddl_if
+    return condition is None or condition.dialect in (None, db.engine.dialect.name)
+
+BUDGETS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'budgets.csv')
+
+def seed_budgets():
+    """Load data/budgets.csv when no annual budgets exist yet"""
+    if db.session.query(AnnualBudget.year).first() is not None or not os.path.exists(BUDGETS_CSV):
+        return
+    try:
+        years = budget_loader.load_budgets(BUDGETS_CSV)
+        db.session.commit()
+        print(f"✓ Annual budgets loaded for {', '.join(map(str, years))}")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error loading {BUDGETS_CSV}: {e}")
+
 def seed_from_sql():
     """Execute seed.sql to populate database"""
     try:
@@ -103,74 +457,17 @@ def seed_from_sql():
         print(f"Error executing seed.sql: {e}")
         raise
 
-def sync_to_json():
-    """Export all database records to JSON files"""
-    try:
-        data_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-        os.makedirs(data_folder, exist_ok=True)
-        
-        # Export projects
-        projects = Project.query.all()
-        projects_data = []
-        for p in projects:
-            projects_data.append({
-                'project_id': p.project_id,
-                'project_name': p.project_name,
-                'project_description': p.project_description,
-                'project_image': p.project_image,
-                'allocated_budget': p.allocated_budget,
-                'budget_spent': p.budget_spent,
-                'project_status': p.project_status,
-                'start_date': p.start_date.isoformat() if p.start_date else None,
-                'end_date': p.end_date.isoformat() if p.end_date else None,
-                'region_name': p.region_name,
-                'sector_name': p.sector_name
-            })
-        
-        projects_path = os.path.join(data_folder, 'projects.json')
-        with open(projects_path, 'w', encoding='utf-8') as f:
-            json.dump(projects_data, f, ensure_ascii=False, indent=2)
-        
-        # Export feedback
-        feedback_list = Feedback.query.all()
-        feedback_data = []
-        for fb in feedback_list:
-            feedback_data.append({
-                'feedback_id': fb.feedback_id,
-                'name': fb.name,
-                'email': fb.email,
-                'message': fb.message,
-                'created_at': fb.created_at.isoformat() if fb.created_at else None
-            })
-        
-        feedback_path = os.path.join(data_folder, 'feedback.json')
-        with open(feedback_path, 'w', encoding='utf-8') as f:
-            json.dump(feedback_data, f, ensure_ascii=False, indent=2)
-        
-        # Export reports
-        reports = ProjectReport.query.all()
-        reports_data = []
-        for r in reports:
-            reports_data.append({
-                'report_id': r.report_id,
-                'project_id': r.project_id,
-                'reporter_name': r.reporter_name,
-                'reporter_email': r.reporter_email,
-                'report_subject': r.report_subject,
-                'report_message': r.report_message,
-                'report_type': r.report_type,
-                'report_image': r.report_image,
-                'is_resolved': r.is_resolved,
-                'created_at': r.created_at.isoformat() if r.created_at else None
-            })
-        
-        reports_path = os.path.join(data_folder, 'reports.json')
-        with open(reports_path, 'w', encoding='utf-8') as f:
-            json.dump(reports_data, f, ensure_ascii=False, indent=2)
-        
+def sync_to_json(full=False):
+    """Schedule committed database changes to be written to data/*.json.
+
+    Returns immediately; the export worker writes the files in the background.
+    A full export runs synchronously.
+    """
+    if full:
+        export_worker.export(full=True)
         print("✓ Data synced to JSON files")
-    except Exception as e:
-        print(f"Error syncing to JSON: {e}")
+    else:
+        export_worker.request()
 
 # Run initialization when app starts
 init_db()
@@ -224,15 +521,20 @@ def logout():
     flash('You have been logged out.', 'success')
     return redirect(url_for('home'))
 
+def project_totals():
+    """Project count and budget sums, read from the budget rollup"""
+    count, allocated, spent = db.session.query(
+        func.coalesce(func.sum(BudgetRollup.project_count), 0),
+        func.coalesce(func.sum(BudgetRollup.allocated_total), 0),
+        func.coalesce(func.sum(BudgetRollup.spent_total), 0)
+    ).one()
+    return count, allocated, spent
+
 # Home
 @app.route('/')
 def home():
     try:
-        # Use ORM to query projects
-        projects = Project.query.all()
-        projects_count = len(projects)
-        total_alloc = sum(p.allocated_budget for p in projects) if projects else 0
-        total_spent = sum(p.budget_spent for p in projects) if projects else 0
+        projects_count, total_alloc, total_spent = project_totals()
         
         # Get recent feedback for carousel
         recent_feedback = Feedback.query.order_by(Feedback.created_at.desc()).limit(20).all()
@@ -250,32 +552,128 @@ def home():
                                total_spent=0,
                                recent_feedback=[])
 
+# Projects shown in the budget page carousel, largest allocations first
+BUDGET_CAROUSEL_SIZE = 20
+
 @app.route('/budget')
 def budget():
     try:
-        projects = Project.query.all()
-        return render_template('budget.html', projects=projects)
+        projects = Project.query.order_by(
+            func.coalesce(Project.allocated_budget, 0).desc(), Project.project_id.desc()
+        ).limit(BUDGET_CAROUSEL_SIZE).all()
+        # The page fetches the selected year's figures from /api/budget/<year>
+        years = [row[0] for row in db.session.query(AnnualBudget.year).order_by(AnnualBudget.year.desc())]
+        return render_template('budget.html', projects=projects, years=years)
     except Exception as e:
         print(f"Error in budget route: {e}")
-        return render_template('budget.html', projects=[])
+        return render_template('budget.html', projects=[], years=[])
+
+
+# Cached JSON API responses. Budget totals only change when a project is
+# added, edited or deleted; those routes invalidate the cache. The TTL bounds
+# staleness in other worker processes.
+budget_cache = ResultCache(ttl=300)
 
+def cached_json_response(cache, key, compute):
+    """Serve a cached JSON payload with a strong ETag, or 304 if unchanged"""
+    body, etag = cache.get(key, compute)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Let clients keep a copy but revalidate it with If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def sector_budget_totals():
+    return [
+        {'sector': row['sector'] or None, 'allocated': row['allocated'], 'spent': row['spent']}
+        for row in budget_rollup_rows(['sector'], {})
+    ]
 
 # API endpoint for budget data (used by Chart.js)
 @app.route('/api/budget_data')
 def budget_data():
     try:
-        result = db.session.query(
-            Project.sector_name,
-            func.sum(Project.allocated_budget).label('allocated'),
-            func.sum(Project.budget_spent).label('spent')
-        ).group_by(Project.sector_name).all()
-
-        rows = [{'sector': row[0], 'allocated': row[1] or 0, 'spent': row[2] or 0} for row in result]
-        return jsonify(rows)
+        return cached_json_response(budget_cache, 'sectors', sector_budget_totals)
     except Exception as e:
         print(f"Error in budget_data: {e}")
         return jsonify([])
 
+# National budgets change only when budget_loader.py runs, in another
+# process, so entries simply expire
+annual_budget_cache = ResultCache(ttl=3600)
+
+@app.route('/api/budget/<int:year>')
+def annual_budget(year):
+    """National budget for one year with its sector and region breakdowns"""
+    def load():
+        payload = db.session.query(AnnualBudget.payload).filter_by(year=year).scalar()
+        if payload is None:
+            raise LookupError(year)
+        return json.loads(payload)
+    
+    try:
+        return cached_json_response(annual_budget_cache, year, load)
+    except LookupError:
+        return jsonify({'error': f'No budget for {year}'}), 404
+    except Exception as e:
+        print(f"Error in annual_budget: {e}")
+        return jsonify({'error': 'Budget data is unavailable'}), 500
+
+# Dimensions of the budget rollup: API name -> column. '' (year 0) stands
+# for projects without a sector, region, status or start date.
+ROLLUP_DIMENSIONS = {
+    'sector': BudgetRollup.sector_name,
+    'region': BudgetRollup.region_name,
+    'status': BudgetRollup.project_status,
+    'year': BudgetRollup.start_year,
+}
+
+def budget_rollup_rows(group, filters):
+    """Sum the rollup over the group dimensions, restricted to filters"""
+    columns = [ROLLUP_DIMENSIONS[name].label(name) for name in group]
+    query = db.session.query(
+        *columns,
+        func.sum(BudgetRollup.project_count).label('projects'),
+        func.sum(BudgetRollup.allocated_total).label('allocated'),
+        func.sum(BudgetRollup.spent_total).label('spent')
+    ).filter(*[ROLLUP_DIMENSIONS[name] == value for name, value in filters.items()])
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+    return [
+        {**row._asdict(), 'projects': row.projects or 0,
+         'allocated': row.allocated or 0, 'spent': row.spent or 0}
+        for row in query.all() if row.projects
+    ]
+
+@app.route('/api/budget_rollup')
+def budget_rollup():
+    """Budget totals for any slice of the rollup.
+
+    ?group=sector,year picks the dimensions to break down by (none gives a
+    single grand total); ?sector=..&region=..&status=..&year=.. filter it.
+    """
+    group = [name for name in request.args.get('group', '').split(',') if name]
+    unknown = [name for name in group if name not in ROLLUP_DIMENSIONS]
+    if unknown or len(set(group)) != len(group):
+        return jsonify({'error': f"group must be a list of {', '.join(ROLLUP_DIMENSIONS)}"}), 400
+    filters = {}
+    for name in ROLLUP_DIMENSIONS:
+        value = request.args.get(name)
+        if value is None:
+            continue
+        if name == 'year':
+            if not value.isdigit():
+                return jsonify({'error': 'year must be a number'}), 400
+            value = int(value)
+        filters[name] = value
+    
+    key = json.dumps([group, sorted(filters.items())])
+    try:
+        return cached_json_response(budget_cache, key, lambda: budget_rollup_rows(group, filters))
+    except Exception as e:
+        print(f"Error in budget_rollup: {e}")
+        return jsonify({'error': 'Budget totals are unavailable'}), 500
+
 # Hardcoded lists for dropdowns
 REGIONS_LIST = [
     'National Capital Region', 'Cordillera Administrative Region', 'Region I', 'Region II',
@@ -293,27 +691,323 @@ SECTORS_LIST = [
 @app.route('/projects')
 def projects():
     try:
-        projects_list = Project.query.order_by(Project.project_id.desc()).all()
-        
-        # Count projects by status
-        total_count = len(projects_list)
-        planned_count = sum(1 for p in projects_list if p.project_status == 'Planned')
-        ongoing_count = sum(1 for p in projects_list if p.project_status == 'Ongoing')
-        completed_count = sum(1 for p in projects_list if p.project_status == 'Completed')
+        # Count projects by status from the budget rollup
+        status_counts = dict(db.session.query(
+            BudgetRollup.project_status,
+            func.sum(BudgetRollup.project_count)
+        ).group_by(BudgetRollup.project_status).all())
         
+        # Project cards are loaded page by page from /api/projects
         return render_template('projects.html', 
-                               projects=projects_list, 
                                regions_list=REGIONS_LIST,
                                sectors_list=SECTORS_LIST,
-                               total_count=total_count,
-                               planned_count=planned_count,
-                               ongoing_count=ongoing_count,
-                               completed_count=completed_count)
+                               total_count=sum(status_counts.values()),
+                               planned_count=status_counts.get('Planned', 0),
+                               ongoing_count=status_counts.get('Ongoing', 0),
+                               completed_count=status_counts.get('Completed', 0))
     except Exception as e:
         print(f"Error in projects route: {e}")
-        return render_template('projects.html', projects=[], regions_list=[], sectors_list=[],
+        return render_template('projects.html', regions_list=[], sectors_list=[],
                                total_count=0, planned_count=0, ongoing_count=0, completed_count=0)
 
+# Page size limits for /api/projects
+PROJECTS_PAGE_SIZE = 24
+PROJECTS_MAX_PAGE_SIZE = 100
+
+# Sort options: name -> (SQL sort key, cursor value decoder). Keys never
+# return NULL so that keyset comparisons behave. Each key has a matching
+# expression index in models.py; keep the two in sync.
+PROJECT_SORTS = {
+    'name': (lambda: func.lower(Project.project_name), str),
+    'date': (lambda: func.coalesce(Project.start_date, date(9999, 12, 31)), date.fromisoformat),
+    'budget': (lambda: func.coalesce(Project.allocated_budget, 0), float),
+    'spent': (lambda: func.coalesce(Project.budget_spent, 0), float),
+    'reports': (lambda: Project.report_count, int),
+}
+
+def encode_cursor(sort_value, project_id):
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, project_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def decode_cursor(cursor, decode_value):
+    sort_value, project_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return decode_value(sort_value), int(project_id)
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def project_card(project):
+    if project.project_image:
+        image = project.project_image
+    else:
+        image = f"images/{project.sector_name or 'Road Infrastructure'}.webp"
+    return {
+        'id': project.project_id,
+        'name': project.project_name,
+        'description': project.project_description or '',
+        'sector': project.sector_name or '',
+        'region': project.region_name or '',
+        'status': project.project_status,
+        'allocated_budget': project.allocated_budget or 0,
+        'spent': project.budget_spent or 0,
+        'start_date': project.start_date.isoformat() if project.start_date else None,
+        'image_url': image_variant(image, 'thumb'),
+        'detail_url': url_for('project_detail', pid=project.project_id),
+        'reports': project.report_count
+    }
+
+# Paginated project listing (used by the projects page)
+@app.route('/api/projects')
+def api_projects():
+    sort = request.args.get('sort', 'name')
+    order = request.args.get('order', 'asc')
+    if sort not in PROJECT_SORTS or order not in ('asc', 'desc'):
+        return jsonify({'error': 'Invalid sort'}), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', PROJECTS_PAGE_SIZE)), 1), PROJECTS_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    sort_key, decode_value = PROJECT_SORTS[sort]
+    key = sort_key()
+    
+    query = db.session.query(Project, key)
+    
+    # Filters
+    status = request.args.get('status', '').strip()
+    region = request.args.get('region', '').strip()
+    sector = request.args.get('sector', '').strip()
+    search = request.args.get('q', '').strip()
+    if status:
+        query = query.filter(Project.project_status == status)
+    if region:
+        query = query.filter(Project.region_name == region)
+    if sector:
+        query = query.filter(Project.sector_name == sector)
+    if search:
+        pattern = f"%{escape_like(search)}%"
+        query = query.filter(
+            Project.project_name.ilike(pattern, escape='\\') |
+            Project.sector_name.ilike(pattern, escape='\\') |
+            Project.region_name.ilike(pattern, escape='\\')
+        )
+    
+    # Keyset pagination: continue after the last (sort key, id) seen
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor, decode_value)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        position = tuple_(key, Project.project_id)
+        query = query.filter(position > after if order == 'asc' else position < after)
+    
+    if order == 'asc':
+        query = query.order_by(key.asc(), Project.project_id.asc())
+    else:
+        query = query.order_by(key.desc(), Project.project_id.desc())
+    
+    try:
+        rows = query.limit(limit + 1).all()
+    except Exception as e:
+        print(f"Error in api_projects: {e}")
+        return jsonify({'error': 'Error fetching projects'}), 500
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_project, last_key = rows[-1]
+        next_cursor = encode_cursor(last_key, last_project.project_id)
+    
+    return jsonify({
+        'projects': [project_card(project) for project, _ in rows],
+        'next_cursor': next_cursor
+    })
+
+PROJECT_SUGGEST_LIMIT = 10
+PROJECT_SUGGEST_MAX_LIMIT = 20
+
+@app.route('/api/projects/suggest')
+def suggest_projects():
+    """Typeahead matches for the project picker on /feedback"""
+    term = request.args.get('q', '').strip()
+    try:
+        limit = min(max(int(request.args.get('limit', PROJECT_SUGGEST_LIMIT)), 1), PROJECT_SUGGEST_MAX_LIMIT)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    if not term:
+        return jsonify({'projects': []})
+    
+    query = db.session.query(
+        Project.project_id, Project.project_name, Project.sector_name, Project.region_name
+    ).filter(Project.project_name.ilike(f"%{escape_like(term)}%", escape='\\'))
+    if db.engine.dialect.name == 'postgresql':
+        # Closest names first, in ix_project_name_trgm order
+        query = query.order_by(Project.project_name.op('<->')(term))
+    else:
+        prefix = Project.project_name.ilike(f"{escape_like(term)}%", escape='\\')
+        query = query.order_by(prefix.desc(), Project.project_name)
+    
+    try:
+        rows = query.limit(limit).all()
+    except Exception as e:
+        print(f"Error in suggest_projects: {e}")
+        return jsonify({'error': 'Error fetching projects'}), 500
+    
+    response = jsonify({'projects': [dict(row._mapping) for row in rows]})
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+# ---------------- FULL-TEXT SEARCH ----------------
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+# Matches kept per kind: every match is ranked and the best ones kept, so
+# results can be paged through this many of each kind at most.
+SEARCH_MAX_CANDIDATES = 1000
+SEARCH_KINDS = ('all', 'projects', 'reports')
+
+# ts_headline markers, swapped for <mark> after the text is HTML-escaped
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\ue000', '\ue001'
+HIGHLIGHT_OPTIONS = f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_STOP}"'
+SNIPPET_OPTIONS = HIGHLIGHT_OPTIONS + ', MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=" … "'
+
+def highlighted(headline):
+    """Escape a ts_headline() result, keeping its matches marked"""
+    html = str(escape(headline or ''))
+    return Markup(html.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>'))
+
+def ranked_hits(kind, vector, id_column, tsquery):
+    """Best SEARCH_MAX_CANDIDATES matches of one kind as (kind, id, rank)"""
+    rank = func.ts_rank(vector, tsquery).label('rank')
+    best = select(id_column.label('id'), rank).where(
+        vector.op('@@')(tsquery)
+    ).order_by(rank.desc(), id_column).limit(SEARCH_MAX_CANDIDATES).subquery()
+    return select(literal(kind).label('kind'), best.c.id, best.c.rank)
+
+def search_hits(term, kind='all', page=1, limit=SEARCH_PAGE_SIZE):
+    """Ranked, highlighted matches for a search page.
+
+    Returns (results, has_more). The page is ranked first and only its rows
+    get the (expensive) ts_headline highlighting.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+    parts = []
+    if kind in ('all', 'projects'):
+        parts.append(ranked_hits('project', project_search_vector(), Project.project_id, tsquery))
+    if kind in ('all', 'reports'):
+        parts.append(ranked_hits('report', report_search_vector(), ProjectReport.report_id, tsquery))
+    hits = union_all(*parts).subquery()
+    rows = db.session.execute(
+        select(hits).order_by(hits.c.rank.desc(), hits.c.kind, hits.c.id)
+        .offset((page - 1) * limit).limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    project_ids = [row.id for row in rows if row.kind == 'project']
+    report_ids = [row.id for row in rows if row.kind == 'report']
+    projects = {}
+    if project_ids:
+        for p in db.session.execute(select(
+            Project.project_id, Project.sector_name, Project.region_name,
+            func.ts_headline(SEARCH_CONFIG, Project.project_name, tsquery,
+                             'HighlightAll=true, ' + HIGHLIGHT_OPTIONS).label('title'),
+            func.ts_headline(SEARCH_CONFIG, func.coalesce(Project.project_description, ''), tsquery,
+                             SNIPPET_OPTIONS).label('snippet')
+        ).where(Project.project_id.in_(project_ids))):
+            projects[p.project_id] = {
+                'type': 'project',
+                'id': p.project_id,
+                'project_id': p.project_id,
+                'title': highlighted(p.title),
+                'snippet': highlighted(p.snippet),
+                'meta': ' · '.join(filter(None, [p.sector_name, p.region_name])),
+            }
+    reports = {}
+    if report_ids:
+        for r in db.session.execute(select(
+            ProjectReport.report_id, ProjectReport.project_id, ProjectReport.report_type,
+            ProjectReport.created_at, Project.project_name,
+            func.ts_headline(SEARCH_CONFIG, ProjectReport.report_subject, tsquery,
+                             'HighlightAll=true, ' + HIGHLIGHT_OPTIONS).label('title'),
+            func.ts_headline(SEARCH_CONFIG, ProjectReport.report_message, tsquery,
+                             SNIPPET_OPTIONS).label('snippet')
+        ).join(Project, Project.project_id == ProjectReport.project_id)
+         .where(ProjectReport.report_id.in_(report_ids))):
+            reports[r.report_id] = {
+                'type': 'report',
+                'id': r.report_id,
+                'project_id': r.project_id,
+                'title': highlighted(r.title),
+                'snippet': highlighted(r.snippet),
+                'meta': f"{r.report_type or 'General'} report on {r.project_name}"
+                        + (f" · {r.created_at.strftime('%B %d, %Y')}" if r.created_at else ''),
+            }
+    
+    results = []
+    for row in rows:
+        hit = (projects if row.kind == 'project' else reports).get(row.id)
+        if hit:
+            hit['rank'] = round(row.rank, 4)
+            hit['url'] = url_for('project_detail', pid=hit['project_id'])
+            results.append(hit)
+    return results, has_more
+
+def search_args():
+    """(term, kind, page, limit) from the query string; raises ValueError"""
+    term = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'all')
+    if kind not in SEARCH_KINDS:
+        raise ValueError('Invalid type')
+    page = max(int(request.args.get('page', 1)), 1)
+    limit = min(max(int(request.args.get('limit', SEARCH_PAGE_SIZE)), 1), SEARCH_MAX_PAGE_SIZE)
+    return term, kind, page, limit
+
+@app.route('/api/search')
+def api_search():
+    try:
+        term, kind, page, limit = search_args()
+    except ValueError:
+        return jsonify({'error': 'Invalid search parameters'}), 400
+    if db.engine.dialect.name != 'postgresql':
+        return jsonify({'error': 'Full-text search requires PostgreSQL'}), 501
+    if not term:
+        return jsonify({'results': [], 'page': page, 'has_more': False})
+    
+    try:
+        results, has_more = search_hits(term, kind, page, limit)
+    except Exception as e:
+        print(f"Error in api_search: {e}")
+        return jsonify({'error': 'Error searching'}), 500
+    
+    for hit in results:
+        hit['title'], hit['snippet'] = str(hit['title']), str(hit['snippet'])
+    return jsonify({'results': results, 'page': page, 'has_more': has_more})
+
+@app.route('/search')
+def search():
+    try:
+        term, kind, page, limit = search_args()
+    except ValueError:
+        term, kind, page, limit = request.args.get('q', '').strip(), 'all', 1, SEARCH_PAGE_SIZE
+    
+    results, has_more, error = [], False, None
+    if term:
+        if db.engine.dialect.name != 'postgresql':
+            error = 'Full-text search requires PostgreSQL.'
+        else:
+            try:
+                results, has_more = search_hits(term, kind, page, limit)
+            except Exception as e:
+                print(f"Error in search: {e}")
+                error = 'Error searching. Please try again.'
+    
+    return render_template('search.html', q=term, kind=kind, page=page,
+                           results=results, has_more=has_more, error=error)
+
 # Project detail
 @app.route('/project/<int:pid>')
 def project_detail(pid):
@@ -323,15 +1017,78 @@ def project_detail(pid):
             flash('Project not found', 'warning')
             return redirect(url_for('projects'))
         
-        # Get reports for this project
-        reports = ProjectReport.query.filter_by(project_id=pid).order_by(ProjectReport.created_at.desc()).all()
-        
-        return render_template('project_details.html', project=project, reports=reports)
+        # Reports are loaded page by page from /api/project/<pid>/reports
+        return render_template('project_details.html', project=project)
     except Exception as e:
         print(f"Error in project_detail: {e}")
         flash('Error loading project', 'danger')
         return redirect(url_for('projects'))
 
+# Page size limits for /api/project/<pid>/reports
+REPORTS_PAGE_SIZE = 10
+REPORTS_MAX_PAGE_SIZE = 50
+
+# First page of each project's report feed, by project id. Submitting or
+# resolving a report invalidates its project's entry.
+report_feed_cache = ResultCache(ttl=60)
+
+def report_card(report):
+    return {
+        'id': report.report_id,
+        'subject': report.report_subject,
+        'message': report.report_message,
+        'type': report.report_type or 'General',
+        'reporter': report.reporter_name or 'Anonymous',
+        'image_url': image_variant('images/projects/' + report.report_image, 'thumb') if report.report_image else None,
+        'resolved': bool(report.is_resolved),
+        'created_at': report.created_at.strftime('%Y-%m-%d %H:%M') if report.created_at else ''
+    }
+
+def report_feed_page(pid, after=None, limit=REPORTS_PAGE_SIZE):
+    """One page of a project's reports, newest first, and the next cursor.
+
+    Raises LookupError for a project that doesn't exist.
+    """
+    key = report_feed_key()
+    query = ProjectReport.query.add_columns(key).filter(ProjectReport.project_id == pid)
+    if after:
+        query = query.filter(tuple_(key, ProjectReport.report_id) < after)
+    rows = query.order_by(key.desc(), ProjectReport.report_id.desc()).limit(limit + 1).all()
+    reports = [report for report, _ in rows]
+    if not reports and db.session.get(Project, pid) is None:
+        raise LookupError(pid)
+    
+    next_cursor = None
+    if len(reports) > limit:
+        reports = reports[:limit]
+        next_cursor = encode_cursor(rows[limit - 1][1], reports[-1].report_id)
+    return {'reports': [report_card(report) for report in reports], 'next_cursor': next_cursor}
+
+# Paginated report feed (used by the project details page)
+@app.route('/api/project/<int:pid>/reports')
+def project_reports(pid):
+    try:
+        limit = min(max(int(request.args.get('limit', REPORTS_PAGE_SIZE)), 1), REPORTS_MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    cursor = request.args.get('cursor')
+    try:
+        if cursor:
+            try:
+                after = decode_cursor(cursor, datetime.fromisoformat)
+            except (ValueError, TypeError):
+                return jsonify({'error': 'Invalid cursor'}), 400
+            return jsonify(report_feed_page(pid, after, limit))
+        if limit != REPORTS_PAGE_SIZE:
+            return jsonify(report_feed_page(pid, limit=limit))
+        return cached_json_response(report_feed_cache, pid, lambda: report_feed_page(pid))
+    except LookupError:
+        return jsonify({'error': 'Project not found'}), 404
+    except Exception as e:
+        print(f"Error in project_reports: {e}")
+        return jsonify({'error': 'Error fetching reports'}), 500
+
 # Get project data for editing (API endpoint)
 @app.route('/api/project/<int:pid>')
 def get_project_data(pid):
@@ -352,12 +1109,34 @@ def get_project_data(pid):
             'allocated_budget': project.allocated_budget or 0,
             'spent': project.budget_spent or 0,
             'description': project.project_description or '',
-            'project_image': project.project_image or ''
+            'project_image': project.project_image or '',
+            'project_image_url': image_variant(project.project_image, 'medium') if project.project_image else ''
         })
     except Exception as e:
         print(f"Error in get_project_data: {e}")
         return jsonify({'error': 'Error fetching project'}), 500
 
+# Export queue status (admin only)
+@app.route('/api/export_status')
+def export_status():
+    if 'admin_user' not in session or not session.get('admin_user'):
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    return jsonify(export_worker.status())
+
+# Upload garbage collection status of this worker (admin only)
+@app.route('/api/upload_gc_status')
+def upload_gc_status():
+    if 'admin_user' not in session or not session.get('admin_user'):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify(upload_collector.status())
+
+# Prometheus metrics, merged across all worker processes
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
 # Edit project (admin only)
 @app.route('/project/<int:pid>/edit', methods=['GET', 'POST'])
 def edit_project(pid):
@@ -384,16 +1163,10 @@ def edit_project(pid):
             if 'project_image' in request.files:
                 file = request.files['project_image']
                 if file and file.filename and allowed_file(file.filename):
-                    # Ensure upload directory exists
-                    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                    filename = secure_filename(file.filename)
-                    # Add timestamp to avoid duplicates
-                    import time
-                    filename = f"{int(time.time())}_{filename}"
-                    file.save(os.path.join(UPLOAD_FOLDER, filename))
-                    project.project_image = f"images/projects/{filename}"
+                    project.project_image = f"images/projects/{save_upload(file)}"
             
             db.session.commit()
+            budget_cache.invalidate()
             
             # Sync to JSON
             sync_to_json()
@@ -421,21 +1194,23 @@ def delete_project(pid):
             flash('Project not found', 'warning')
             return redirect(url_for('projects'))
         
-        # Delete associated reports first
+        # Delete associated reports first; the bulk delete skips the ORM
+        # events, so release their images' references explicitly
+        release_report_images(pid)
         ProjectReport.query.filter_by(project_id=pid).delete()
         
-        # Delete project image file if exists
-        if project.project_image:
-            image_path = os.path.join(app.static_folder, project.project_image)
-            if os.path.exists(image_path):
-                try:
-                    os.remove(image_path)
-                except Exception as img_err:
-                    print(f"Error deleting image file: {img_err}")
+        # Uploads may be shared, so the image file itself is left for
+        # garbage collection once nothing references it
         
         # Delete the project
         db.session.delete(project)
         db.session.commit()
+        budget_cache.invalidate()
+        report_feed_cache.invalidate(pid)
+        
+        # Sync to JSON
+        sync_to_json()
+        
         flash('Project deleted successfully', 'success')
     except Exception as e:
         db.session.rollback()
@@ -465,19 +1240,16 @@ def feedback():
             
             try:
                 project_id = int(project_id)
+                if db.session.get(Project, project_id) is None:
+                    flash('Please choose a project from the list', 'danger')
+                    return redirect(url_for('feedback'))
                 
                 # Handle file upload
                 image_file = None
                 if 'report_image' in request.files:
                     file = request.files['report_image']
                     if file and file.filename and allowed_file(file.filename):
-                        filename = secure_filename(file.filename)
-                        # Add timestamp to avoid filename conflicts
-                        import time
-                        timestamp = int(time.time())
-                        filename = f"report_{timestamp}_{filename}"
-                        file.save(os.path.join(UPLOAD_FOLDER, filename))
-                        image_file = filename
+                        image_file = save_upload(file)
                     elif file and file.filename:
                         flash('Invalid file type. Please use PNG, JPG, JPEG, GIF, or WebP.', 'danger')
                         return redirect(url_for('feedback'))
@@ -493,6 +1265,7 @@ def feedback():
                 )
                 db.session.add(new_report)
                 db.session.commit()
+                report_feed_cache.invalidate(project_id)
                 
                 # Sync to JSON
                 sync_to_json()
@@ -523,13 +1296,10 @@ def feedback():
         
         return redirect(url_for('feedback'))
     
-    # Get projects for report dropdown
-    projects_list = Project.query.order_by(Project.project_name).all()
-    
-    # Get recent feedback
+    # Get recent feedback; the report form looks projects up as you type
     recent = Feedback.query.order_by(Feedback.created_at.desc()).limit(10).all()
     
-    return render_template('feedback.html', recent=recent, projects=projects_list)
+    return render_template('feedback.html', recent=recent)
 
 # About
 @app.route('/about')
@@ -561,6 +1331,7 @@ def resolve_report(report_id):
         if report:
             report.is_resolved = True
             db.session.commit()
+            report_feed_cache.invalidate(report.project_id)
             
             # Sync to JSON
             sync_to_json()
@@ -573,6 +1344,9 @@ def resolve_report(report_id):
         flash('Error updating report.', 'danger')
     return redirect(url_for('admin'))
 
+# Projects and unresolved reports listed on /admin, newest first
+ADMIN_LIST_SIZE = 50
+
 # Simple admin to add projects (demo only — protect in production)
 @app.route('/admin', methods=['GET', 'POST'])
 def admin():
@@ -594,14 +1368,7 @@ def admin():
                 if 'project_image' in request.files:
                     file = request.files['project_image']
                     if file and file.filename and allowed_file(file.filename):
-                        # Ensure upload directory exists
-                        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-                        filename = secure_filename(file.filename)
-                        # Add timestamp to avoid duplicates
-                        import time
-                        filename = f"{int(time.time())}_{filename}"
-                        file.save(os.path.join(UPLOAD_FOLDER, filename))
-                        project_image = f"images/projects/{filename}"
+                        project_image = f"images/projects/{save_upload(file)}"
                 
                 new_project = Project(
                     project_name=name,
@@ -615,6 +1382,11 @@ def admin():
                 )
                 db.session.add(new_project)
                 db.session.commit()
+                budget_cache.invalidate()
+                
+                # Sync to JSON
+                sync_to_json()
+                
                 flash('Project added.', 'success')
             except Exception as e:
                 db.session.rollback()
@@ -623,17 +1395,11 @@ def admin():
         return redirect(url_for('admin'))
     
     try:
-        # Get projects
-        projects = Project.query.order_by(Project.project_id.desc()).limit(50).all()
+        # Get projects (unresolved report counts are kept on each project)
+        projects = Project.query.order_by(Project.project_id.desc()).limit(ADMIN_LIST_SIZE).all()
         
-        # Add unresolved report count to each project
         projects_with_reports = []
         for project in projects:
-            unresolved_count = ProjectReport.query.filter_by(
-                project_id=project.project_id,
-                is_resolved=False
-            ).count()
-            
             project_dict = {
                 'id': project.project_id,
                 'name': project.project_name,
@@ -644,21 +1410,31 @@ def admin():
                 'status': project.project_status,
                 'region': project.region_name or '',
                 'project_image': project.project_image or '',
-                'unresolved_reports': unresolved_count
+                'unresolved_reports': project.unresolved_report_count
             }
             projects_with_reports.append(project_dict)
         
-        # Get all unresolved reports with project info
-        unresolved_reports = ProjectReport.query.filter_by(is_resolved=False).order_by(ProjectReport.created_at.desc()).all()
+        # Latest unresolved reports joined with their project names, read
+        # from the partial ix_project_report_unresolved index
+        unresolved_reports = db.session.query(
+            ProjectReport,
+            Project.project_name
+        ).outerjoin(
+            Project, Project.project_id == ProjectReport.project_id
+        ).filter(ProjectReport.is_resolved == False).order_by(
+            ProjectReport.created_at.desc()
+        ).limit(ADMIN_LIST_SIZE).all()
+        unresolved_total = db.session.query(func.count(ProjectReport.report_id)).filter(
+            ProjectReport.is_resolved == False
+        ).scalar()
         
         # Convert reports to dictionaries with project names
         reports_with_project_names = []
-        for report in unresolved_reports:
-            project = Project.query.get(report.project_id)
+        for report, project_name in unresolved_reports:
             report_dict = {
                 'id': report.report_id,
                 'project_id': report.project_id,
-                'project_name': project.project_name if project else 'Unknown Project',
+                'project_name': project_name or 'Unknown Project',
                 'reporter_name': report.reporter_name,
                 'reporter_email': report.reporter_email,
                 'report_subject': report.report_subject,
@@ -678,11 +1454,13 @@ def admin():
     except Exception as e:
         projects_with_reports = []
         reports_with_project_names = []
+        unresolved_total = 0
         departments = []
         regions = []
         print(f"Admin query error: {e}")
     
-    return render_template('admin.html', projects=projects_with_reports, unresolved_reports=reports_with_project_names, departments=departments, regions=regions)
+    return render_template('admin.html', projects=projects_with_reports, unresolved_reports=reports_with_project_names,
+                           unresolved_total=unresolved_total, departments=departments, regions=regions)
 
 if __name__ == '__main__':
     with app.app_context():
@@ -0,0 +1,80 @@
+# benchmarks/admin_queries.py
+"""Check that the admin dashboard's work doesn't grow with the data.
+
+Renders /admin at growing data sizes and counts the statements executed and
+the report cards rendered per request. Synthetic rows are inserted in a
+transaction that is rolled back, so the configured database is left
+untouched. Exits non-zero if either count grows past its bound.
+
+    python -m benchmarks.admin_queries
+"""
+import random
+import sys
+from sqlalchemy import event  # type: ignore
+from app import app, db, SECTORS_LIST, REGIONS_LIST, ADMIN_LIST_SIZE
+from models import Project, ProjectReport
+
+
+def insert_rows(n_projects, reports_per_project):
+    rng = random.Random(n_projects)
+    db.session.execute(Project.__table__.insert(), [{
+        'project_name': f'Benchmark Project {i}',
+        'region_name': rng.choice(REGIONS_LIST),
+        'sector_name': rng.choice(SECTORS_LIST)
+    } for i in range(n_projects)])
+    project_ids = [pid for (pid,) in db.session.query(Project.project_id)]
+    db.session.execute(ProjectReport.__table__.insert(), [{
+        'project_id': pid,
+        'report_subject': 'Benchmark report',
+        'report_message': 'Synthetic report',
+        'is_resolved': rng.random() < 0.3
+    } for pid in project_ids for _ in range(reports_per_project)])
+
+
+def count_admin_queries(client):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/admin')
+        assert response.status_code == 200, response.status_code
+        assert b'Benchmark Project' in response.data, 'synthetic rows not visible'
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return len(statements), response.data.count(b'class="admin-report-card"')
+
+
+def main():
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_user'] = 'admin'
+
+    counts = []
+    most_cards = 0
+    # Requests reuse this app context, and so this session and its transaction
+    with app.app_context():
+        try:
+            for n_projects, reports_per_project in [(10, 1), (100, 5), (1000, 10)]:
+                insert_rows(n_projects, reports_per_project)
+                queries, cards = count_admin_queries(client)
+                counts.append(queries)
+                most_cards = max(most_cards, cards)
+                print(f"+{n_projects} projects x {reports_per_project} reports: "
+                      f"{queries} queries, {cards} reports listed")
+        finally:
+            db.session.rollback()
+
+    if len(set(counts)) != 1:
+        print("✗ Query count grows with data size")
+        sys.exit(1)
+    if most_cards > ADMIN_LIST_SIZE:
+        print(f"✗ More than {ADMIN_LIST_SIZE} reports listed")
+        sys.exit(1)
+    print("✓ Query count is constant and the report list is bounded")
+
+
+if __name__ == '__main__':
+    main()
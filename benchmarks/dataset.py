@@ -0,0 +1,260 @@
+# benchmarks/dataset.py
+"""Generate a large synthetic dataset and bulk-load it with COPY.
+
+Rows are generated from a seeded RNG, so the same arguments always produce
+the same data. Rows are rendered to CSV in batches and streamed into
+PostgreSQL with COPY FROM STDIN, so memory stays flat at any size.
+
+    python -m benchmarks.dataset --projects 1000000 --feedback 10000000 --reports 5000000
+    python -m benchmarks.dataset --projects 10000 --feedback 100000 --reports 50000 --truncate
+
+Loads into the database configured in app.py. Requires PostgreSQL.
+"""
+import argparse
+import csv
+import io
+import itertools
+import math
+import time
+from datetime import date, datetime, timedelta
+from random import Random
+from sqlalchemy import text  # type: ignore
+from app import app, db, SECTORS_LIST, REGIONS_LIST
+from models import rebuild_budget_rollup, recount_project_reports
+
+# Rows rendered per CSV batch handed to COPY
+BATCH_SIZE = 10000
+
+# Share of projects per region, roughly following population
+REGION_WEIGHTS = {
+    'National Capital Region': 13, 'Cordillera Administrative Region': 2, 'Region I': 5,
+    'Region II': 3, 'Region III': 12, 'Region IV-A': 15, 'Region IV-B': 3, 'Region V': 6,
+    'Region VI': 7, 'Region VII': 7, 'Region VIII': 4, 'Region IX': 3, 'Region X': 4,
+    'Region XI': 5, 'Region XII': 4, 'Caraga': 2, 'BARMM': 5,
+}
+
+SECTOR_WEIGHTS = {
+    'Road Infrastructure': 30, 'Bridge Infrastructure': 12, 'Flood Control and Drainage': 20,
+    'Public Buildings': 10, 'Water Resources and Irrigation': 10, 'Special Infrastructure Projects': 5,
+    'Disaster Response and Rehabilitation': 6, 'Local Infrastructure Support': 7,
+}
+
+# status -> (share of projects, range of budget spent as a fraction of allocation)
+STATUSES = {
+    'Planned': (25, (0.0, 0.1)),
+    'Ongoing': (45, (0.1, 0.9)),
+    'Completed': (30, (0.85, 1.05)),
+}
+
+SECTOR_WORKS = {
+    'Road Infrastructure': ['Road Widening', 'Road Concreting', 'Farm-to-Market Road', 'Road Rehabilitation'],
+    'Bridge Infrastructure': ['Bridge Construction', 'Bridge Retrofitting', 'Footbridge', 'Bridge Widening'],
+    'Flood Control and Drainage': ['Flood Control Structure', 'Drainage Improvement', 'River Dike', 'Revetment'],
+    'Public Buildings': ['Multi-Purpose Building', 'School Building', 'Health Center', 'Municipal Hall'],
+    'Water Resources and Irrigation': ['Irrigation Canal', 'Water Supply System', 'Small Water Impounding', 'Pumping Station'],
+    'Special Infrastructure Projects': ['Convergence Road', 'Tourism Road', 'Economic Zone Access', 'Port Access Road'],
+    'Disaster Response and Rehabilitation': ['Evacuation Center', 'Slope Protection', 'Post-Typhoon Rehabilitation', 'Seawall'],
+    'Local Infrastructure Support': ['Barangay Road', 'Street Lighting', 'Covered Court', 'Public Market'],
+}
+PLACES = ['San Isidro', 'Poblacion', 'San Jose', 'Santa Cruz', 'San Roque', 'Bagong Silang',
+          'Santo Niño', 'San Antonio', 'Malinis', 'Mabini', 'Rizal', 'Bonifacio', 'Del Pilar']
+
+FIRST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlo', 'Liza', 'Mark', 'Grace',
+               'Ramon', 'Lucia', 'Erik', 'Jenny', 'Miguel', 'Patricia', 'Henry', 'Susan', 'Daniel', 'Carla']
+LAST_NAMES = ['Dela Cruz', 'Santos', 'Reyes', 'Lopez', 'Tan', 'Cruz', 'Lim', 'Garcia', 'Mendoza', 'Bautista']
+FEEDBACK_MESSAGES = [
+    'Please include status updates for delayed projects.',
+    'Some project details lack complete budget breakdown.',
+    'It would be helpful to upload proof-of-work photos monthly.',
+    'The project timelines are not always updated.',
+    'Add a feature to compare planned vs. actual spending.',
+    'Good initiative but needs more transparency on project bidding.',
+]
+REPORT_TYPES = {'General': 35, 'Issue': 35, 'Concern': 20, 'Suggestion': 10}
+REPORT_SUBJECTS = ['Work Stopped', 'Substandard Materials', 'Delayed Completion', 'Unfinished Section',
+                   'Ghost Project', 'Flooding Persists', 'Cracks Observed', 'No Signage']
+
+FIRST_START_DATE = date(2015, 1, 1)
+START_DATE_DAYS = (date(2025, 12, 31) - FIRST_START_DATE).days
+SUBMISSIONS_START = datetime(2023, 1, 1)
+SUBMISSIONS_SECONDS = int((datetime(2025, 12, 31) - SUBMISSIONS_START).total_seconds())
+
+
+class CsvStream:
+    """File-like object that renders rows to CSV only as COPY reads it"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = ''
+
+    def _render_batch(self):
+        out = io.StringIO()
+        csv.writer(out).writerows(itertools.islice(self._rows, BATCH_SIZE))
+        return out.getvalue()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = self._render_batch()
+            if not chunk:
+                break
+            self._buffer += chunk
+        if size < 0:
+            data, self._buffer = self._buffer, ''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def weighted(rng, weights):
+    """Return a function drawing keys of weights with their relative frequency"""
+    keys = list(weights)
+    cum_weights = list(itertools.accumulate(weights.values()))
+    return lambda: rng.choices(keys, cum_weights=cum_weights)[0]
+
+
+def submission_time(rng):
+    # Submissions grow over time: sqrt skews the draw towards recent dates
+    offset = int(math.sqrt(rng.random()) * SUBMISSIONS_SECONDS)
+    return (SUBMISSIONS_START + timedelta(seconds=offset)).isoformat(sep=' ')
+
+
+def person(rng):
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def project_rows(n, seed):
+    rng = Random(f"projects-{seed}")
+    region = weighted(rng, {r: REGION_WEIGHTS.get(r, 1) for r in REGIONS_LIST})
+    sector = weighted(rng, {s: SECTOR_WEIGHTS.get(s, 1) for s in SECTORS_LIST})
+    status = weighted(rng, {s: share for s, (share, _) in STATUSES.items()})
+    for i in range(1, n + 1):
+        project_sector = sector()
+        project_region = region()
+        project_status = status()
+        work = rng.choice(SECTOR_WORKS.get(project_sector, ['Infrastructure Project']))
+        # Budgets are log-normal: median around ₱20M, a long tail of mega projects
+        allocated = round(rng.lognormvariate(math.log(20_000_000), 1.2), 2)
+        low, high = STATUSES[project_status][1]
+        spent = round(allocated * rng.uniform(low, high), 2)
+        start = FIRST_START_DATE + timedelta(days=rng.randrange(START_DATE_DAYS))
+        end = start + timedelta(days=rng.randint(180, 1460))
+        yield (
+            f"{work}, {rng.choice(PLACES)} #{i}",
+            f"{work} in {rng.choice(PLACES)}, {project_region}.",
+            'images/projects/project1.webp',
+            allocated, spent, project_status,
+            start.isoformat(), end.isoformat(),
+            project_region, project_sector,
+        )
+
+
+def feedback_rows(n, seed):
+    rng = Random(f"feedback-{seed}")
+    for _ in range(n):
+        name = person(rng)
+        # A third of citizens submit anonymously
+        anonymous = rng.random() < 0.33
+        yield (
+            None if anonymous else name,
+            None if anonymous else f"{name.split()[0].lower()}{rng.randrange(1000)}@email.com",
+            rng.choice(FEEDBACK_MESSAGES),
+            submission_time(rng),
+        )
+
+
+def report_rows(n, seed, first_project_id, n_projects):
+    rng = Random(f"reports-{seed}")
+    report_type = weighted(rng, REPORT_TYPES)
+    for _ in range(n):
+        # Heavy-tailed: a few contested projects collect tens of thousands of
+        # reports while most get a handful
+        rank = int(n_projects * rng.random() ** 4)
+        # Scatter the hot projects so they aren't all the oldest ones
+        project_id = first_project_id + (rank * 2654435761) % n_projects
+        name = person(rng)
+        yield (
+            project_id, name, f"{name.split()[0].lower()}{rng.randrange(1000)}@email.com",
+            rng.choice(REPORT_SUBJECTS), 'Citizen report about this project.',
+            report_type(), None,
+            't' if rng.random() < 0.6 else 'f',
+            submission_time(rng),
+        )
+
+
+def copy_rows(cursor, table, columns, rows, total):
+    started = time.perf_counter()
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        CsvStream(rows), size=1 << 20
+    )
+    elapsed = time.perf_counter() - started
+    print(f"✓ {table}: {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+def generate(n_projects, n_feedback, n_reports, seed=42, truncate=False):
+    """Bulk-load a synthetic dataset into the configured database"""
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        if truncate:
+            cursor.execute("TRUNCATE project_report, feedback, project RESTART IDENTITY")
+        # Project ids are copied explicitly, from a block above every existing
+        # row: the sequence may have gaps or run ahead of max(project_id), so
+        # the ids COPY would draw from it can't be predicted. The lock keeps
+        # other writers out until the sequence is moved past the block.
+        cursor.execute("LOCK TABLE project IN EXCLUSIVE MODE")
+        cursor.execute("SELECT coalesce(max(project_id), 0) FROM project")
+        first_project_id = cursor.fetchone()[0] + 1
+
+        copy_rows(cursor, 'project', [
+            'project_id', 'project_name', 'project_description', 'project_image', 'allocated_budget',
+            'budget_spent', 'project_status', 'start_date', 'end_date', 'region_name', 'sector_name'
+        ], ((project_id,) + row for project_id, row in
+            zip(itertools.count(first_project_id), project_rows(n_projects, seed))), n_projects)
+        if n_projects:
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence('project', 'project_id'), %s)",
+                (first_project_id + n_projects - 1,)
+            )
+        copy_rows(cursor, 'feedback', ['name', 'email', 'message', 'created_at'],
+                  feedback_rows(n_feedback, seed), n_feedback)
+        if n_projects:
+            copy_rows(cursor, 'project_report', [
+                'project_id', 'reporter_name', 'reporter_email', 'report_subject', 'report_message',
+                'report_type', 'report_image', 'is_resolved', 'created_at'
+            ], report_rows(n_reports, seed, first_project_id, n_projects), n_reports)
+        connection.commit()
+    finally:
+        connection.close()
+
+    # COPY bypasses the ORM events that maintain the report counters
+    # and the budget rollup
+    started = time.perf_counter()
+    recount_project_reports()
+    rebuild_budget_rollup()
+    db.session.commit()
+    db.session.execute(text("ANALYZE project"))
+    db.session.execute(text("ANALYZE feedback"))
+    db.session.execute(text("ANALYZE project_report"))
+    db.session.execute(text("ANALYZE budget_rollup"))
+    db.session.commit()
+    print(f"✓ Report counters, budget rollup and planner statistics updated in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--feedback', type=int, default=1000000)
+    parser.add_argument('--reports', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=42, help='RNG seed; same seed, same data')
+    parser.add_argument('--truncate', action='store_true', help='delete all existing rows first')
+    args = parser.parse_args()
+
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            parser.error('bulk loading with COPY requires PostgreSQL')
+        generate(args.projects, args.feedback, args.reports, seed=args.seed, truncate=args.truncate)
+
+
+if __name__ == '__main__':
+    main()
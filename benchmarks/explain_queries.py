@@ -0,0 +1,167 @@
+# benchmarks/explain_queries.py
+"""Check that each route's queries use the indexes declared in models.py.
+
+Requests every route through the Flask test client, captures the SELECT
+statements it issues, and runs EXPLAIN ANALYZE on each one. Reports the
+indexes each plan uses and whether the route's expected indexes appear.
+Requires PostgreSQL.
+
+By default a synthetic dataset is inserted inside a transaction that is rolled
+back at the end, so the configured database is left untouched:
+
+    python -m benchmarks.explain_queries --projects 200000 --feedback 1000000 --reports 500000
+    python -m benchmarks.explain_queries --existing     # use the data already loaded
+
+Exits non-zero if any expected index is unused.
+"""
+import argparse
+import sys
+from sqlalchemy import event, text  # type: ignore
+from app import app, db, SECTORS_LIST, REGIONS_LIST
+from models import rebuild_budget_rollup, recount_project_reports
+
+# route -> indexes its queries are expected to use
+ROUTE_INDEXES = {
+    '/': ['ix_feedback_created_at'],
+    '/feedback': ['ix_feedback_created_at'],
+    '/api/projects/suggest?q=road': ['ix_project_name_trgm'],
+    '/api/search?q=synthetic 4242': ['ix_project_search', 'ix_project_report_search'],
+    '/api/project/{pid}/reports': ['ix_project_report_feed_key'],
+    '/admin': ['ix_project_report_unresolved'],
+    # Budget charts read the small budget_rollup table, never project
+    '/api/budget_data': [],
+    '/api/budget_rollup?group=region,year&status=Ongoing': [],
+    '/api/projects?sort=name': ['ix_project_name_lower'],
+    '/api/projects?sort=date&order=desc': ['ix_project_start_date'],
+    '/api/projects?sort=budget&order=desc': ['ix_project_allocated_budget'],
+    '/api/projects?sort=spent': ['ix_project_budget_spent'],
+    '/api/projects?sort=reports&order=desc': ['ix_project_report_count'],
+}
+
+
+def insert_synthetic_data(n_projects, n_feedback, n_reports):
+    """Bulk insert rows server-side with generate_series"""
+    first_id = db.session.execute(text("SELECT coalesce(max(project_id), 0) FROM project")).scalar()
+    params = {
+        'regions': REGIONS_LIST,
+        'sectors': SECTORS_LIST,
+        'statuses': ['Planned', 'Ongoing', 'Completed'],
+    }
+    db.session.execute(text("""
+        INSERT INTO project (project_name, project_description, allocated_budget, budget_spent,
+                             project_status, start_date, region_name, sector_name)
+        SELECT 'Synthetic Project ' || g, 'Synthetic project description ' || g,
+               round((random() * 10000000)::numeric, 2), round((random() * 5000000)::numeric, 2),
+               (:statuses)[1 + g % 3], DATE '2020-01-01' + (g % 2000),
+               (:regions)[1 + g % array_length(:regions, 1)], (:sectors)[1 + g % array_length(:sectors, 1)]
+        FROM generate_series(1, :n) g
+    """), dict(params, n=n_projects))
+    db.session.execute(text("""
+        INSERT INTO feedback (name, email, message, created_at)
+        SELECT 'Citizen ' || g, 'citizen' || g || '@example.com', 'Synthetic feedback ' || g,
+               TIMESTAMP '2023-01-01' + (g || ' seconds')::interval * 60
+        FROM generate_series(1, :n) g
+    """), {'n': n_feedback})
+    # Reports are skewed towards the first synthetic projects (cubed random)
+    db.session.execute(text("""
+        INSERT INTO project_report (project_id, report_subject, report_message, report_type,
+                                    is_resolved, created_at)
+        SELECT :first_id + 1 + floor(power(random(), 3) * :n_projects)::int,
+               'Synthetic report ' || g, 'Synthetic report message ' || g, 'General',
+               random() < 0.8, TIMESTAMP '2023-01-01' + (g || ' seconds')::interval * 60
+        FROM generate_series(1, :n) g
+    """), {'n': n_reports, 'first_id': first_id, 'n_projects': n_projects})
+    recount_project_reports()
+    rebuild_budget_rollup()
+    # Give the planner statistics for the new rows
+    db.session.execute(text("ANALYZE project; ANALYZE feedback; ANALYZE project_report; ANALYZE budget_rollup"))
+
+
+def capture_statements(client, path):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(path)
+        assert response.status_code == 200, f"{path} returned {response.status_code}"
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return statements
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+def explain(statement, parameters):
+    """Run EXPLAIN ANALYZE and return (indexes used, node types, execution ms)"""
+    result = db.session.connection().exec_driver_sql(
+        'EXPLAIN (ANALYZE, FORMAT JSON) ' + statement, parameters
+    ).scalar()
+    root = result[0]
+    nodes = list(plan_nodes(root['Plan']))
+    indexes = {node['Index Name'] for node in nodes if 'Index Name' in node}
+    node_types = [node['Node Type'] for node in nodes]
+    return indexes, node_types, root['Execution Time']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--feedback', type=int, default=500000)
+    parser.add_argument('--reports', type=int, default=300000)
+    parser.add_argument('--existing', action='store_true', help='use the data already in the database')
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_user'] = 'admin'
+
+    missing = []
+    # Requests reuse this app context, and so this session and its transaction
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("✗ EXPLAIN ANALYZE checks require PostgreSQL")
+            sys.exit(2)
+        try:
+            if not args.existing:
+                print(f"→ Inserting {args.projects} projects, {args.feedback} feedback, {args.reports} reports...")
+                insert_synthetic_data(args.projects, args.feedback, args.reports)
+
+            # Detail page of the most reported project
+            pid = db.session.execute(text(
+                "SELECT project_id FROM project_report GROUP BY project_id ORDER BY count(*) DESC LIMIT 1"
+            )).scalar() or 1
+
+            for route, expected in ROUTE_INDEXES.items():
+                path = route.format(pid=pid)
+                used = set()
+                print(f"\n{path}")
+                for statement, parameters in capture_statements(client, path):
+                    indexes, node_types, ms = explain(statement, parameters)
+                    used |= indexes
+                    summary = ' '.join(statement.split())[:90]
+                    print(f"  {ms:9.2f} ms  {', '.join(sorted(indexes)) or 'no index':<40} {summary}")
+                    print(f"               plan: {' > '.join(node_types)}")
+                for index in expected:
+                    ok = index in used
+                    print(f"  {'✓' if ok else '✗'} uses {index}")
+                    if not ok:
+                        missing.append((path, index))
+        finally:
+            db.session.rollback()
+
+    if missing:
+        print(f"\n✗ {len(missing)} expected index(es) unused")
+        sys.exit(1)
+    print("\n✓ All routes use their indexes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# benchmarks/home_totals.py
+"""Compare the home page totals computed in Python vs. in SQL.
+
+Inserts N synthetic projects inside a transaction that is rolled back at the
+end, so the configured database is left untouched.
+
+    python -m benchmarks.home_totals 100 10000 100000
+"""
+import random
+import sys
+import time
+from app import app, db, project_totals, SECTORS_LIST, REGIONS_LIST
+from models import Project
+
+
+def totals_in_python():
+    """The previous implementation: hydrate every Project and sum in Python"""
+    projects = Project.query.all()
+    return (len(projects),
+            sum(p.allocated_budget for p in projects),
+            sum(p.budget_spent for p in projects))
+
+
+def timed(fn, repeat=5):
+    """Best-of-N wall time in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def insert_projects(n):
+    rng = random.Random(n)
+    rows = []
+    for i in range(n):
+        allocated = rng.randint(100, 10000) * 1000.0
+        rows.append({
+            'project_name': f'Benchmark Project {i}',
+            'allocated_budget': allocated,
+            'budget_spent': allocated * rng.random(),
+            'project_status': rng.choice(['Planned', 'Ongoing', 'Completed']),
+            'region_name': rng.choice(REGIONS_LIST),
+            'sector_name': rng.choice(SECTORS_LIST)
+        })
+    db.session.execute(Project.__table__.insert(), rows)
+
+
+def main(sizes):
+    print(f"{'projects':>10} {'python (ms)':>12} {'sql (ms)':>10} {'speedup':>8}")
+    with app.app_context():
+        try:
+            inserted = 0
+            for n in sorted(sizes):
+                insert_projects(n - inserted)
+                inserted = n
+                python_ms = timed(totals_in_python)
+                sql_ms = timed(project_totals)
+                print(f"{n:>10} {python_ms:>12.2f} {sql_ms:>10.2f} {python_ms / sql_ms:>7.1f}x")
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [100, 10000, 100000])
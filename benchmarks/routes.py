@@ -0,0 +1,191 @@
+# benchmarks/routes.py
+"""Route benchmark: latency percentiles, SQL statement count and peak memory.
+
+Requests each route through the Flask test client against the configured
+database and compares the results with a stored baseline:
+
+    python -m benchmarks.routes --load --projects 100000 --feedback 1000000 --reports 500000
+    python -m benchmarks.routes --update-baseline      # record the current numbers
+    python -m benchmarks.routes --tolerance 20         # fail if >20% slower or more queries
+
+--load bulk-loads a synthetic dataset first (see benchmarks/dataset.py).
+Exits non-zero when a route regresses against the baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from sqlalchemy import event, func  # type: ignore
+from app import app, db
+from models import Project, Feedback, ProjectReport
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# name -> path; {pid} is the most reported project
+ROUTES = {
+    'home': '/',
+    'projects': '/projects',
+    'api_projects': '/api/projects?sort=budget&order=desc',
+    'project_detail': '/project/{pid}',
+    'project_reports': '/api/project/{pid}/reports',
+    'search': '/api/search?q=road',
+    'budget': '/budget',
+    'budget_data': '/api/budget_data',
+    'annual_budget': '/api/budget/2025',
+    'budget_rollup': '/api/budget_rollup?group=sector,year',
+    'feedback': '/feedback',
+    'thumbnail': '/thumbnail/projects/project1.webp?w=480',
+    'admin': '/admin',
+}
+
+
+class StatementCounter:
+    """Counts SQL statements sent to the database"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentile(sorted_values, pct):
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure_route(client, path, counter, requests, warmup, memory_requests):
+    for _ in range(warmup):
+        client.get(path)
+
+    latencies = []
+    statements = 0
+    for _ in range(requests):
+        before = counter.count
+        started = time.perf_counter()
+        response = client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        statements = max(statements, counter.count - before)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path} returned {response.status_code}")
+
+    # Memory is measured in a separate pass; tracing slows requests down
+    tracemalloc.start()
+    for _ in range(memory_requests):
+        client.get(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'queries': statements,
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('routes', {}).get(name)
+        if not base:
+            continue
+        if result['p95_ms'] > base['p95_ms'] * (1 + tolerance / 100):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: {result['queries']} queries vs baseline {base['queries']}")
+    return regressions
+
+
+def dataset_size():
+    return {
+        'projects': db.session.query(func.count(Project.project_id)).scalar(),
+        'feedback': db.session.query(func.count(Feedback.feedback_id)).scalar(),
+        'reports': db.session.query(func.count(ProjectReport.report_id)).scalar(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per route')
+    parser.add_argument('--memory-requests', type=int, default=3, help='requests traced for peak memory')
+    parser.add_argument('--tolerance', type=float, default=20.0, help='allowed p95 slowdown in percent')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--routes', nargs='*', choices=list(ROUTES), help='only these routes')
+    parser.add_argument('--load', action='store_true', help='bulk-load a synthetic dataset first')
+    parser.add_argument('--projects', type=int, default=100000)
+    parser.add_argument('--feedback', type=int, default=1000000)
+    parser.add_argument('--reports', type=int, default=500000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin_user'] = 'admin'
+
+    with app.app_context():
+        if args.load:
+            if db.engine.dialect.name != 'postgresql':
+                parser.error('--load bulk-loads with COPY and requires PostgreSQL')
+            from benchmarks.dataset import generate
+            generate(args.projects, args.feedback, args.reports, seed=args.seed, truncate=True)
+
+        pid = db.session.query(Project.project_id).order_by(
+            Project.report_count.desc(), Project.project_id
+        ).limit(1).scalar() or 1
+        size = dataset_size()
+        db.session.remove()
+        counter = StatementCounter(db.engine)
+
+    print(f"Dataset: {size['projects']:,} projects, {size['feedback']:,} feedback, {size['reports']:,} reports\n")
+    print(f"{'route':<16} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KB':>10}")
+    results = {}
+    for name in args.routes or ROUTES:
+        path = ROUTES[name].format(pid=pid)
+        result = measure_route(client, path, counter, args.requests, args.warmup, args.memory_requests)
+        results[name] = result
+        print(f"{name:<16} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+              f"{result['queries']:>8} {result['peak_memory_kb']:>10.1f}")
+
+    if args.update_baseline:
+        baseline = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'dataset': size,
+            'routes': results,
+        }
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\n✓ Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n→ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('dataset') != size:
+        print(f"\n→ Warning: baseline was recorded on a different dataset: {baseline.get('dataset')}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) against the baseline:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
+    print(f"\n✓ No route is more than {args.tolerance:g}% slower or issues more queries than the baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/startup.py
+"""Cold start and worker fork time of the production setup.
+
+Cold start is the time to import the app (including init_db() against an
+already initialized database) in a fresh interpreter, as the gunicorn master
+does with preload_app. Fork time is what each worker adds on top: fork(),
+wsgi.after_fork() and serving its first request.
+
+    python -m benchmarks.startup --runs 5 --forks 10
+
+Fork timing requires a POSIX system.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+started = time.perf_counter()
+import wsgi
+print(time.perf_counter() - started)
+"""
+
+
+def cold_start(runs):
+    """Seconds to import the app in a fresh interpreter, and total process time"""
+    imports, totals = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        )
+        totals.append(time.perf_counter() - started)
+        imports.append(float(result.stdout.strip().splitlines()[-1]))
+    return imports, totals
+
+
+def fork_workers(forks, path):
+    """Per fork: (fork() call in the parent, fork -> ready, fork -> first response)"""
+    import wsgi
+
+    timings = []
+    for _ in range(forks):
+        read_fd, write_fd = os.pipe()
+        started = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            wsgi.after_fork()
+            ready = time.perf_counter() - started
+            response = wsgi.app.test_client().get(path)
+            first_response = time.perf_counter() - started
+            os.write(write_fd, json.dumps([ready, first_response, response.status_code]).encode())
+            os._exit(0)
+        fork_call = time.perf_counter() - started
+        os.close(write_fd)
+        with os.fdopen(read_fd) as pipe:
+            ready, first_response, status = json.loads(pipe.read())
+        os.waitpid(pid, 0)
+        if status != 200:
+            raise RuntimeError(f"{path} returned {status} in a forked worker")
+        timings.append((fork_call, ready, first_response))
+    return timings
+
+
+def summary(label, seconds):
+    ms = sorted(s * 1000 for s in seconds)
+    print(f"{label:<28} min {ms[0]:9.2f} ms   median {statistics.median(ms):9.2f} ms   max {ms[-1]:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--forks', type=int, default=10, help='workers to fork')
+    parser.add_argument('--path', default='/', help='first request served by each forked worker')
+    args = parser.parse_args()
+
+    imports, totals = cold_start(args.runs)
+    summary('cold start: import app', imports)
+    summary('cold start: process total', totals)
+
+    if not hasattr(os, 'fork'):
+        print("→ Skipping fork timing: os.fork() is not available on this platform")
+        return
+    timings = fork_workers(args.forks, args.path)
+    summary('fork() in parent', [t[0] for t in timings])
+    summary('fork -> worker ready', [t[1] for t in timings])
+    summary('fork -> first response', [t[2] for t in timings])
+
+
+if __name__ == '__main__':
+    main()
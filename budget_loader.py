@@ -0,0 +1,121 @@
+# budget_loader.py
+"""Bulk-load annual national budgets from CSV.
+
+    python budget_loader.py data/budgets.csv
+
+The CSV has a header row and one row per amount:
+
+    year,category,name,budget
+    2025,annual,,6095900000000
+    2025,sector,Road Infrastructure,541980000000
+    2025,region,National Capital Region,834600000000
+
+Every year in the file replaces that year's rows in the database; other
+years are left alone. Running workers pick up the change once their
+/api/budget/<year> cache entries expire.
+"""
+import csv
+import json
+import sys
+from sqlalchemy import insert  # type: ignore
+from models import db, AnnualBudget, SectorBudget, RegionBudget
+
+CATEGORIES = ('annual', 'sector', 'region')
+
+
+def read_budget_csv(path):
+    """Parse the CSV into {year: {'annual': amount, 'sectors': {...}, 'regions': {...}}}"""
+    years = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'year', 'category', 'name', 'budget'} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+        for row in reader:
+            where = f"{path}, line {reader.line_num}"
+            try:
+                year = int(row['year'])
+                amount = float(row['budget'])
+            except (TypeError, ValueError):
+                raise ValueError(f"{where}: year and budget must be numbers")
+            category = (row['category'] or '').strip().lower()
+            name = (row['name'] or '').strip()
+            if category not in CATEGORIES:
+                raise ValueError(f"{where}: category must be one of {', '.join(CATEGORIES)}")
+            if category != 'annual' and not name:
+                raise ValueError(f"{where}: {category} rows need a name")
+
+            budget = years.setdefault(year, {'annual': None, 'sectors': {}, 'regions': {}})
+            if category == 'annual':
+                budget['annual'] = amount
+            else:
+                budget[category + 's'][name] = amount
+
+    for year, budget in years.items():
+        if budget['annual'] is None:
+            raise ValueError(f"{path}: no annual row for {year}")
+    return years
+
+
+def build_payload(year, budget):
+    """The /api/budget/<year> response: breakdowns sorted largest first"""
+    def ranked(amounts, key):
+        return [{key: name, 'budget': amount}
+                for name, amount in sorted(amounts.items(), key=lambda item: (-item[1], item[0]))]
+
+    return {
+        'year': year,
+        'annual': budget['annual'],
+        'sectors': ranked(budget['sectors'], 'sector'),
+        'regions': ranked(budget['regions'], 'region'),
+    }
+
+
+def load_budgets(path):
+    """Replace the budgets of every year in the CSV. The caller commits."""
+    years = read_budget_csv(path)
+    for year, budget in sorted(years.items()):
+        # Children first: SQLite doesn't enforce ON DELETE CASCADE by default
+        SectorBudget.query.filter_by(year=year).delete()
+        RegionBudget.query.filter_by(year=year).delete()
+        AnnualBudget.query.filter_by(year=year).delete()
+        db.session.flush()
+
+        db.session.add(AnnualBudget(
+            year=year,
+            total_budget=budget['annual'],
+            payload=json.dumps(build_payload(year, budget), separators=(',', ':'))
+        ))
+        db.session.flush()
+        if budget['sectors']:
+            db.session.execute(insert(SectorBudget), [
+                {'year': year, 'sector_name': name, 'budget': amount}
+                for name, amount in budget['sectors'].items()
+            ])
+        if budget['regions']:
+            db.session.execute(insert(RegionBudget), [
+                {'year': year, 'region_name': name, 'budget': amount}
+                for name, amount in budget['regions'].items()
+            ])
+    return sorted(years)
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(f"Usage: python {sys.argv[0]} BUDGETS.csv")
+        sys.exit(2)
+
+    from app import app
+    with app.app_context():
+        try:
+            years = load_budgets(sys.argv[1])
+            db.session.commit()
+        except (OSError, ValueError) as e:
+            db.session.rollback()
+            print(f"✗ {e}")
+            sys.exit(1)
+    print(f"✓ Loaded budgets for {', '.join(map(str, years))}")
+
+
+if __name__ == '__main__':
+    main()
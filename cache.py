@@ -0,0 +1,67 @@
+# cache.py
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """In-process cache of JSON response bodies, invalidated by write paths.
+
+    Each entry keeps the serialized body and a strong ETag (a hash of the
+    body), so a hit costs neither a query nor re-serialization. The optional
+    ttl bounds staleness in other worker processes, which don't see this
+    process's invalidations. Keys can come from request arguments, so at
+    most max_entries are kept: when full, expired entries are dropped first,
+    then the least recently used.
+    """
+
+    def __init__(self, ttl=None, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return (body, etag) for key, calling compute() on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and (self.ttl is None or now - entry[2] < self.ttl):
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+            generation = self._generation
+
+        body = json.dumps(compute(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        etag = hashlib.sha1(body).hexdigest()
+
+        with self._lock:
+            # Don't store a result computed before an invalidation
+            if generation == self._generation:
+                self._entries[key] = (body, etag, now)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_entries:
+                    self._evict(now)
+        return body, etag
+
+    def _evict(self, now):
+        # Called with the lock held and one entry over the limit
+        if self.ttl is not None:
+            for key in [key for key, entry in self._entries.items() if now - entry[2] >= self.ttl]:
+                del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,604 @@
+# exporter.py
+import json
+import os
+import atexit
+import re
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event, select  # type: ignore
+from models import Project, Feedback, ProjectReport
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Rows fetched per round trip when streaming a table out of the database
+EXPORT_BATCH_SIZE = 1000
+
+
+# ---------------- ROW SERIALIZERS ----------------
+def project_to_dict(p):
+    return {
+        'project_id': p.project_id,
+        'project_name': p.project_name,
+        'project_description': p.project_description,
+        'project_image': p.project_image,
+        'allocated_budget': p.allocated_budget,
+        'budget_spent': p.budget_spent,
+        'project_status': p.project_status,
+        'start_date': p.start_date.isoformat() if p.start_date else None,
+        'end_date': p.end_date.isoformat() if p.end_date else None,
+        'region_name': p.region_name,
+        'sector_name': p.sector_name
+    }
+
+
+def feedback_to_dict(fb):
+    return {
+        'feedback_id': fb.feedback_id,
+        'name': fb.name,
+        'email': fb.email,
+        'message': fb.message,
+        'created_at': fb.created_at.isoformat() if fb.created_at else None
+    }
+
+
+def report_to_dict(r):
+    return {
+        'report_id': r.report_id,
+        'project_id': r.project_id,
+        'reporter_name': r.reporter_name,
+        'reporter_email': r.reporter_email,
+        'report_subject': r.report_subject,
+        'report_message': r.report_message,
+        'report_type': r.report_type,
+        'report_image': r.report_image,
+        'is_resolved': r.is_resolved,
+        'created_at': r.created_at.isoformat() if r.created_at else None
+    }
+
+
+# model -> (snapshot file, primary key attribute, serializer)
+SNAPSHOTS = {
+    Project: ('projects.json', 'project_id', project_to_dict),
+    Feedback: ('feedback.json', 'feedback_id', feedback_to_dict),
+    ProjectReport: ('reports.json', 'report_id', report_to_dict),
+}
+
+
+# ---------------- SNAPSHOT FILE FORMAT ----------------
+# Snapshots are ordinary JSON arrays written with one record per line:
+#
+#   [
+#   {"feedback_id": 1, ...},
+#   {"feedback_id": 2, ...}
+#   ]
+#
+# json.dumps escapes newlines inside strings, so every record is exactly one
+# line. That lets a snapshot be written and patched one record at a time
+# without ever holding the whole table in memory. Snapshot writes go to a
+# temporary file that is renamed over the snapshot, so readers always see
+# either the previous or the new complete file.
+#
+# Changes since the snapshot was written are appended, in place, to a change
+# log next to it (projects.json -> projects.changes.ndjson), one JSON object
+# per line:
+#
+#   {"op": "upsert", "id": 7, "record": {"feedback_id": 7, ...}}
+#   {"op": "delete", "id": 3}
+#
+# so an export costs as much as the rows it changed, however big the table.
+# Once the log outgrows a share of the snapshot, or the snapshot is older
+# than COMPACT_MAX_AGE, the log is compacted: folded into the snapshot in one
+# streaming pass, then emptied. ExportWorker also compacts when writes go
+# quiet, so a snapshot on its own trails the database by about
+# COMPACT_MAX_AGE at most. Readers that need every change replay the log over
+# it, as iter_records() does; entries are idempotent, so replaying over a
+# just-compacted snapshot still gives the same records.
+
+HEADER = b'[\n'
+FOOTER = b'\n]\n'
+EMPTY = HEADER + b']\n'
+
+# Compact once the log reaches this share of the snapshot's size, which keeps
+# the amortized cost of a change constant...
+COMPACT_RATIO = 0.25
+# ...but not for tiny logs, and always before a log gets this big (compaction
+# holds the log in memory)
+COMPACT_MIN_BYTES = 64 * 1024
+COMPACT_MAX_BYTES = 16 * 1024 * 1024
+# Seconds a snapshot may go without its pending changes folded in
+COMPACT_MAX_AGE = int(os.getenv('EXPORT_COMPACT_SECONDS', 60))
+
+
+def encode_record(record):
+    return json.dumps(record, ensure_ascii=False).encode('utf-8')
+
+
+def snapshot_path(model):
+    return os.path.join(DATA_FOLDER, SNAPSHOTS[model][0])
+
+
+def log_path(model):
+    return os.path.join(DATA_FOLDER, SNAPSHOTS[model][0].rsplit('.', 1)[0] + '.changes.ndjson')
+
+
+def is_line_snapshot(path):
+    """Check that a snapshot exists and uses the one-record-per-line layout"""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as f:
+        head = f.read(3)
+    return head == b'[\n{' or head == EMPTY[:3]
+
+
+@contextmanager
+def atomic_write(path):
+    """Open a temporary file that replaces path only on success"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def write_records(f, lines):
+    """Write encoded records as the body of a snapshot, then close the array.
+
+    Returns the number of records written.
+    """
+    count = 0
+    for line in lines:
+        if count:
+            f.write(b',\n')
+        f.write(line)
+        count += 1
+    f.write(FOOTER if count else b']\n')
+    return count
+
+
+def write_snapshot(model, rows):
+    """Write a complete snapshot for a model from an iterable of rows.
+
+    The snapshot then holds every change, so the change log is emptied.
+    """
+    serialize = SNAPSHOTS[model][2]
+    with atomic_write(snapshot_path(model)) as f:
+        f.write(HEADER)
+        count = write_records(f, (encode_record(serialize(row)) for row in rows))
+    clear_log(model)
+    return count
+
+
+def rewrite_records(path, pk_name, updates, deletes):
+    """Stream a snapshot into a new file, replacing or dropping changed rows"""
+    pk_pattern = re.compile(rb'^\{"' + re.escape(pk_name.encode()) + rb'": (\d+)')
+
+    def patched_lines(src):
+        for line in src:
+            line = line.rstrip(b'\n').rstrip(b',')
+            match = pk_pattern.match(line)
+            if not match:
+                continue
+            pk = int(match.group(1))
+            if pk in deletes:
+                continue
+            yield updates.pop(pk, line)
+        # Updated rows missing from the snapshot are written as new rows
+        yield from list(updates.values())
+
+    with open(path, 'rb') as src, atomic_write(path) as dst:
+        dst.write(HEADER)
+        write_records(dst, patched_lines(src))
+
+
+# ---------------- CHANGE LOG ----------------
+def encode_upsert(pk, record):
+    return b'{"op": "upsert", "id": %d, "record": %s}' % (pk, encode_record(record))
+
+
+def encode_delete(pk):
+    return b'{"op": "delete", "id": %d}' % pk
+
+
+def append_log(model, entries):
+    """Append encoded entries to a model's change log, in place"""
+    if not entries:
+        return
+    path = log_path(model)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'ab') as f:
+        f.write(b'\n'.join(entries) + b'\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def clear_log(model):
+    path = log_path(model)
+    if os.path.exists(path):
+        os.truncate(path, 0)
+
+
+def read_log(model):
+    """The net effect of a change log: {pk: encoded record, or None when deleted}"""
+    changes = {}
+    path = log_path(model)
+    if not os.path.exists(path):
+        return changes
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Torn write from a crash; the entry was never acknowledged
+                break
+            entry = json.loads(line)
+            changes[entry['id']] = encode_record(entry['record']) if entry['op'] == 'upsert' else None
+    return changes
+
+
+def compact(model):
+    """Fold the change log into the snapshot, then empty the log"""
+    changes = read_log(model)
+    if changes:
+        updates = {pk: line for pk, line in changes.items() if line is not None}
+        deletes = {pk for pk, line in changes.items() if line is None}
+        rewrite_records(snapshot_path(model), SNAPSHOTS[model][1], updates, deletes)
+    clear_log(model)
+
+
+def compact_due(model):
+    try:
+        log_size = os.path.getsize(log_path(model))
+    except FileNotFoundError:
+        return False
+    if not log_size:
+        return False
+    snapshot = os.stat(snapshot_path(model))
+    threshold = min(COMPACT_MAX_BYTES, max(COMPACT_MIN_BYTES, snapshot.st_size * COMPACT_RATIO))
+    return log_size >= threshold or time.time() - snapshot.st_mtime >= COMPACT_MAX_AGE
+
+
+def compact_stale():
+    """Compact every change log that is due; returns the number compacted"""
+    compacted = 0
+    with snapshot_lock():
+        for model in SNAPSHOTS:
+            if is_line_snapshot(snapshot_path(model)) and compact_due(model):
+                compact(model)
+                compacted += 1
+    return compacted
+
+
+def iter_records(model):
+    """Yield a model's exported records: the snapshot with its change log applied"""
+    changes = read_log(model)
+    pk_name = SNAPSHOTS[model][1]
+    with open(snapshot_path(model), 'rb') as f:
+        for line in f:
+            line = line.rstrip(b'\n').rstrip(b',')
+            if not line.startswith(b'{'):
+                continue
+            record = json.loads(line)
+            pk = record[pk_name]
+            if pk in changes:
+                line = changes.pop(pk)
+                if line is None:
+                    continue
+                record = json.loads(line)
+            yield record
+    for line in changes.values():
+        if line is not None:
+            yield json.loads(line)
+
+
+# ---------------- CHANGE TRACKING ----------------
+class ChangeSet:
+    """Primary keys of one model's rows changed by commits not yet on disk.
+
+    Only the keys are kept: each worker process queues its own changes, and
+    nothing orders one process's batch against another's, so the rows are
+    read back from the database when the batch is written, under the export
+    lock. Whichever batch is written last then carries the newest rows.
+    """
+
+    def __init__(self):
+        self.touched = set()
+        self.full = False
+
+    def touch(self, pk):
+        self.touched.add(pk)
+
+    def merge(self, other):
+        self.full = self.full or other.full
+        self.touched |= other.touched
+
+    def __len__(self):
+        return len(self.touched)
+
+
+_pending = {}
+_pending_since = None
+_pending_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def snapshot_lock():
+    """Serialize snapshot writers across threads and worker processes"""
+    with _write_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(DATA_FOLDER, exist_ok=True)
+        with open(os.path.join(DATA_FOLDER, '.export.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _session_changes(session):
+    return session.info.setdefault('export_changes', {})
+
+
+def _changeset(changes, model):
+    if model not in changes:
+        changes[model] = ChangeSet()
+    return changes[model]
+
+
+def _on_after_flush(session, flush_context):
+    changes = _session_changes(session)
+    for obj in session.new | session.deleted:
+        if type(obj) in SNAPSHOTS:
+            _changeset(changes, type(obj)).touch(getattr(obj, SNAPSHOTS[type(obj)][1]))
+    for obj in session.dirty:
+        if type(obj) in SNAPSHOTS and session.is_modified(obj):
+            _changeset(changes, type(obj)).touch(getattr(obj, SNAPSHOTS[type(obj)][1]))
+
+
+def _on_orm_execute(state):
+    # Query.update()/delete() don't report which rows they touch, so their
+    # primary keys are selected with the same criteria first
+    if not (state.is_update or state.is_delete) or state.bind_mapper is None:
+        return None
+    model = state.bind_mapper.class_
+    if model not in SNAPSHOTS:
+        return None
+    pk_column = getattr(model, SNAPSHOTS[model][1])
+    where = state.statement.whereclause
+    ids = state.session.execute(
+        select(pk_column) if where is None else select(pk_column).where(where)
+    ).scalars().all()
+    changeset = _changeset(_session_changes(state.session), model)
+    for pk in ids:
+        changeset.touch(pk)
+    return None
+
+
+def _on_after_commit(session):
+    changes = session.info.pop('export_changes', None)
+    if not changes:
+        return
+    global _pending_since
+    with _pending_lock:
+        for model, changeset in changes.items():
+            _changeset(_pending, model).merge(changeset)
+        if _pending_since is None:
+            _pending_since = time.time()
+
+
+def _on_after_rollback(session):
+    # Changes flushed in a transaction that was rolled back never happened
+    session.info.pop('export_changes', None)
+
+
+def track_changes(session):
+    """Record committed Project/Feedback/ProjectReport changes for export"""
+    event.listen(session, 'after_flush', _on_after_flush)
+    event.listen(session, 'do_orm_execute', _on_orm_execute)
+    event.listen(session, 'after_commit', _on_after_commit)
+    event.listen(session, 'after_rollback', _on_after_rollback)
+
+
+def take_pending():
+    """Remove and return all changes waiting to be exported"""
+    global _pending, _pending_since
+    with _pending_lock:
+        pending, _pending = _pending, {}
+        _pending_since = None
+    return pending
+
+
+def requeue_full(model):
+    """Schedule a full export of a model with the next sync"""
+    global _pending_since
+    with _pending_lock:
+        _changeset(_pending, model).full = True
+        if _pending_since is None:
+            _pending_since = time.time()
+
+
+def pending_rows():
+    """Number of committed row changes not yet written to disk"""
+    with _pending_lock:
+        return sum(len(changeset) for changeset in _pending.values())
+
+
+def pending_since():
+    """Time of the oldest commit not yet written to disk, or None"""
+    return _pending_since
+
+
+# ---------------- EXPORT ----------------
+def stream_rows(model):
+    """Yield a table's rows in primary key order through a server-side cursor.
+
+    Plain column rows are fetched instead of ORM objects, EXPORT_BATCH_SIZE at
+    a time, so memory use doesn't grow with the size of the table.
+    """
+    query = model.query.with_entities(*model.__table__.columns)
+    return query.order_by(getattr(model, SNAPSHOTS[model][1])).yield_per(EXPORT_BATCH_SIZE)
+
+
+def export_full(model):
+    """Rewrite a snapshot from the full table; returns the rows written"""
+    return write_snapshot(model, stream_rows(model))
+
+
+def apply_changes(model, changeset):
+    """Apply a change set to a snapshot, touching only the changed rows.
+
+    Runs under the export lock. The changed rows are read as they are now:
+    ones still in the table are logged as upserts, the others as deletes.
+    Returns the number of rows written.
+    """
+    path = snapshot_path(model)
+    if changeset.full or not is_line_snapshot(path):
+        return export_full(model)
+
+    _, pk_name, serialize = SNAPSHOTS[model]
+    pk_column = getattr(model, pk_name)
+    ids = sorted(changeset.touched)
+    entries = []
+    found = set()
+    for start in range(0, len(ids), EXPORT_BATCH_SIZE):
+        rows = model.query.with_entities(*model.__table__.columns).filter(
+            pk_column.in_(ids[start:start + EXPORT_BATCH_SIZE])
+        )
+        for row in rows:
+            pk = getattr(row, pk_name)
+            found.add(pk)
+            entries.append(encode_upsert(pk, serialize(row)))
+    entries.extend(encode_delete(pk) for pk in ids if pk not in found)
+    append_log(model, entries)
+    if compact_due(model):
+        compact(model)
+    return len(found)
+
+
+def sync_changes(full=False):
+    """Write pending changes (or every table when full=True) to data/*.json.
+
+    Returns the number of rows written.
+    """
+    pending = take_pending()
+    rows = 0
+    error = None
+    with snapshot_lock():
+        for model in SNAPSHOTS:
+            if not full and model not in pending:
+                continue
+            try:
+                rows += export_full(model) if full else apply_changes(model, pending[model])
+            except Exception as e:
+                # Keep the snapshot recoverable: rebuild it on the next sync,
+                # and still export the other tables
+                requeue_full(model)
+                error = error or e
+    if error:
+        raise error
+    return rows
+
+
+# ---------------- BACKGROUND WORKER ----------------
+class ExportWorker:
+    """Runs sync_changes() on a background thread.
+
+    Requests made while an export is waiting or running are coalesced, so a
+    burst of submissions costs one export run instead of one per request.
+    """
+
+    def __init__(self, app, delay=0.5):
+        self.app = app
+        self.delay = delay
+        self.requested = 0
+        self.runs = 0
+        self.last_export_at = None
+        self.last_duration = None
+        self.last_lag = None
+        self.last_error = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Don't lose the tail of a burst when the process shuts down
+        atexit.register(self.flush)
+
+    def request(self):
+        """Schedule an export without waiting for it"""
+        with self._lock:
+            self.requested += 1
+            # Started lazily so no thread exists in a process that forks later
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='json-export', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            if not self._wakeup.wait(COMPACT_MAX_AGE):
+                # Writes went quiet: fold what they logged into the snapshots
+                self.compact()
+                continue
+            # Give a burst of writes a moment to land before exporting
+            time.sleep(self.delay)
+            self._wakeup.clear()
+            with self._lock:
+                self.requested = 0
+            self.export()
+
+    def export(self, full=False):
+        """Export pending changes now, on the calling thread"""
+        since = pending_since()
+        started = time.time()
+        rows = 0
+        try:
+            with self.app.app_context():
+                rows = sync_changes(full=full)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error syncing to JSON: {e}")
+        finished = time.time()
+        metrics.observe_export(finished - started, rows, full, failed=self.last_error is not None)
+        self.runs += 1
+        self.last_export_at = finished
+        self.last_duration = finished - started
+        self.last_lag = finished - since if since else 0.0
+
+    def compact(self):
+        """Compact change logs whose snapshots have fallen behind"""
+        try:
+            compact_stale()
+        except Exception as e:
+            print(f"Error compacting JSON export: {e}")
+
+    def status(self):
+        """Queue depth and export lag, for monitoring"""
+        since = pending_since()
+        return {
+            'queued_requests': self.requested,
+            'pending_rows': pending_rows(),
+            'oldest_pending_seconds': round(time.time() - since, 3) if since else 0.0,
+            'export_runs': self.runs,
+            'last_export_at': self.last_export_at,
+            'last_export_seconds': self.last_duration,
+            'last_export_lag_seconds': self.last_lag,
+            'last_error': self.last_error
+        }
+
+    def flush(self):
+        """Export on the calling thread if anything is still pending"""
+        if pending_since() is not None:
+            self.export()
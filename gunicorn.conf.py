@@ -0,0 +1,29 @@
+# gunicorn.conf.py
+"""gunicorn settings for production: gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY worker processes each serve GUNICORN_THREADS requests at once.
+The app is imported once in the master (preload_app), so init_db() runs a
+single time and workers fork with the code already loaded.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then to bound memory growth
+max_requests = 5000
+max_requests_jitter = 500
+
+# One pooled connection per request thread; read by app.py on import
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+
+
+def post_fork(server, worker):
+    from wsgi import after_fork
+    after_fork()
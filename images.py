@@ -0,0 +1,206 @@
+# images.py
+"""Background processing of uploaded project and report photos.
+
+Uploads are checked to be real images (check_image()) before they are
+stored. Each one is then handed to a process pool (resizing and encoding are
+CPU-bound) that removes EXIF metadata such as GPS position and writes WebP
+variants next to it under variants/:
+
+    static/images/projects/1733_bridge.jpg
+    static/images/projects/variants/1733_bridge.jpg.thumb.webp
+    static/images/projects/variants/1733_bridge.jpg.medium.webp
+
+With remote storage (storage.py) the image is processed in the local cache
+and the files written are then uploaded. Templates ask for a variant with
+app.image_variant(); until it exists (or for images uploaded before this
+pipeline) the original is served instead. Existing uploads in a local
+folder can be processed with:
+
+    python images.py static/images/projects
+"""
+import multiprocessing
+import os
+import sys
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow missing: uploads are served as they are
+    Image = ImageOps = None
+
+# Variant name -> longest side in pixels
+VARIANTS = {
+    'thumb': 480,
+    'medium': 1280,
+}
+VARIANT_FOLDER = 'variants'
+WEBP_QUALITY = 80
+# Quality used when an original JPEG is re-encoded to drop its metadata
+ORIGINAL_JPEG_QUALITY = 95
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', 2))
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def variant_path(path, variant):
+    """File path of one variant of the image at path"""
+    folder, filename = os.path.split(path)
+    return os.path.join(folder, VARIANT_FOLDER, f"{filename}.{variant}.webp")
+
+
+def variant_key(key, variant):
+    """Storage key of one variant of the upload stored under key"""
+    return f"{VARIANT_FOLDER}/{key}.{variant}.webp"
+
+
+def variant_url(static_folder, static_path, variant):
+    """Static path of a variant of static_path if it has been generated, else static_path"""
+    candidate = variant_path(static_path, variant).replace(os.sep, '/')
+    if os.path.exists(os.path.join(static_folder, candidate)):
+        return candidate
+    return static_path
+
+
+def _save_atomic(image, path, **options):
+    # Readers never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        image.save(tmp_path, **options)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def check_image(path):
+    """Why the file at path isn't a usable image, or None if it is.
+
+    Reads the headers and structure without decoding the pixels, so it is
+    cheap enough to run while an upload is received.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return f"not a valid image: {e}"
+    return None
+
+
+def process_image(path):
+    """Strip metadata and write the variants of one image.
+
+    Runs in a pool process on an upload check_image() accepted. Returns
+    (path, error, written): error is None on success and written lists the
+    files written (the variants, and the original when its metadata was
+    removed).
+    """
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            animated = getattr(image, 'n_frames', 1) > 1
+            has_exif = bool(image.getexif()) or 'exif' in image.info
+            image.load()
+            upright = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        return path, f"not a valid image: {e}", []
+
+    written = []
+    try:
+        if has_exif and not animated:
+            # Re-save without EXIF; the pixels are already rotated upright
+            options = {'format': image_format}
+            if image_format == 'JPEG':
+                options['quality'] = ORIGINAL_JPEG_QUALITY
+            if upright.info.get('icc_profile'):
+                options['icc_profile'] = upright.info['icc_profile']
+            _save_atomic(upright, path, **options)
+            written.append(path)
+
+        os.makedirs(os.path.join(os.path.dirname(path), VARIANT_FOLDER), exist_ok=True)
+        if upright.mode not in ('RGB', 'RGBA'):
+            upright = upright.convert('RGBA' if 'transparency' in upright.info else 'RGB')
+        for variant, size in VARIANTS.items():
+            resized = upright.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            _save_atomic(resized, variant_path(path, variant), format='WEBP', quality=WEBP_QUALITY, method=4)
+            written.append(variant_path(path, variant))
+    except OSError as e:
+        return path, f"could not write variants: {e}", written
+    return path, None, written
+
+
+def _executor():
+    """The pool of this process, created on first use.
+
+    Forked gunicorn workers don't inherit a usable pool, so each process
+    creates its own. Pool processes are started by a forkserver (spawned
+    where there is none) rather than forked from a worker whose request
+    threads may hold locks. They import this module and, like any spawned
+    process, the __main__ script (gunicorn's, which does nothing on import).
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            context = multiprocessing.get_context(method)
+            if method == 'forkserver':
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(IMAGE_WORKERS, mp_context=context)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _on_processed(storage, key, future):
+    try:
+        path, error, written = future.result()
+        if error:
+            # The upload is kept, since rows refer to it, and served without variants
+            print(f"Error processing image {key}: {error}")
+            return
+        # A no-op for local storage, where the files are written in place
+        for written_path in written:
+            storage.put(storage.key_for(written_path), written_path)
+    except Exception as e:
+        print(f"Error processing image {key}: {e}")
+
+
+def process_upload(storage, key):
+    """Queue an upload stored under key for processing; returns immediately"""
+    if Image is None:
+        return None
+    future = _executor().submit(process_image, storage.fetch(key))
+    future.add_done_callback(partial(_on_processed, storage, key))
+    return future
+
+
+def main():
+    if Image is None:
+        print("✗ Pillow is not installed")
+        sys.exit(1)
+    if len(sys.argv) != 2:
+        print(f"Usage: python {sys.argv[0]} UPLOAD_FOLDER")
+        sys.exit(2)
+
+    folder = sys.argv[1]
+    paths = [
+        os.path.join(folder, name) for name in sorted(os.listdir(folder))
+        if os.path.isfile(os.path.join(folder, name))
+        and not all(os.path.exists(variant_path(os.path.join(folder, name), v)) for v in VARIANTS)
+    ]
+    failed = 0
+    with ProcessPoolExecutor(IMAGE_WORKERS) as pool:
+        for path, error, _ in pool.map(process_image, paths):
+            if error:
+                failed += 1
+                print(f"✗ {os.path.basename(path)}: {error}")
+    print(f"✓ Processed {len(paths) - failed} of {len(paths)} images")
+
+
+if __name__ == '__main__':
+    main()
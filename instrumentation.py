@@ -0,0 +1,179 @@
+# instrumentation.py
+import json
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from flask import g, has_request_context, request  # type: ignore
+from sqlalchemy import event  # type: ignore
+import metrics
+
+# Statements EXPLAIN accepts; others (COPY, SAVEPOINT...) would abort the transaction
+EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+LOG_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+# Statements slower than this are written to the slow-query log with their plan
+SLOW_QUERY_MS = 200
+SLOW_QUERY_LOG = os.path.join(LOG_FOLDER, 'slow_queries.log')
+SLOW_QUERY_LOG_BYTES = 5 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
+access_log = logging.getLogger('govfunds.access')
+slow_query_log = logging.getLogger('govfunds.slow_queries')
+
+
+class QueryStats:
+    """SQL statements issued while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+
+def _configure_loggers(app):
+    if not access_log.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        access_log.addHandler(handler)
+        access_log.setLevel(logging.INFO)
+        access_log.propagate = False
+
+    if not slow_query_log.handlers:
+        os.makedirs(os.path.dirname(app.config['SLOW_QUERY_LOG']), exist_ok=True)
+        handler = RotatingFileHandler(
+            app.config['SLOW_QUERY_LOG'], maxBytes=SLOW_QUERY_LOG_BYTES,
+            backupCount=SLOW_QUERY_LOG_BACKUPS, encoding='utf-8', delay=True
+        )
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_query_log.addHandler(handler)
+        slow_query_log.setLevel(logging.WARNING)
+        slow_query_log.propagate = False
+
+
+# Savepoint the PostgreSQL EXPLAIN runs in, inside the request's transaction
+EXPLAIN_SAVEPOINT = 'govfunds_explain'
+
+
+def explain(connection, statement, parameters):
+    """Return the estimated plan of a statement as text, without running it.
+
+    Runs on the request's own connection. On PostgreSQL a failed EXPLAIN would
+    abort the open transaction, so it runs inside a savepoint that is rolled
+    back on error and the request's next statement is unaffected.
+    """
+    if connection.dialect.name == 'postgresql':
+        sql = 'EXPLAIN ' + statement
+    elif connection.dialect.name == 'sqlite':
+        sql = 'EXPLAIN QUERY PLAN ' + statement
+    else:
+        return None
+    # A raw DBAPI cursor, so the EXPLAIN doesn't fire these events again
+    dbapi_connection = connection.connection
+    savepoint = connection.dialect.name == 'postgresql' and not getattr(dbapi_connection, 'autocommit', False)
+    cursor = dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(sql, parameters)
+            plan = '\n'.join(' '.join(str(col) for col in row) for row in cursor.fetchall())
+        except Exception:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}")
+            raise
+        if savepoint:
+            cursor.execute(f"RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}")
+        return plan
+    finally:
+        cursor.close()
+
+
+def _log_slow_query(connection, statement, parameters, elapsed_ms, executemany):
+    plan = None
+    if not executemany and statement.lstrip().upper().startswith(EXPLAINABLE):
+        try:
+            plan = explain(connection, statement, parameters)
+        except Exception as e:
+            plan = f"(EXPLAIN failed: {e})"
+    slow_query_log.warning(json.dumps({
+        'duration_ms': round(elapsed_ms, 2),
+        'path': request.path if has_request_context() else None,
+        'statement': ' '.join(statement.split()),
+        'parameters': repr(parameters)[:500],
+    }, ensure_ascii=False) + ('\n' + plan if plan else ''))
+
+
+def instrument_engine(engine, app):
+    """Time every statement; attribute it to the current request, if any"""
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+        if has_request_context() and 'query_stats' in g:
+            g.query_stats.record(statement, elapsed_ms)
+        if elapsed_ms >= app.config['SLOW_QUERY_MS']:
+            _log_slow_query(conn, statement, parameters, elapsed_ms, executemany)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        # The statement failed, so after_cursor_execute won't pop its start time
+        if context.connection is not None and context.connection.info.get('query_start'):
+            context.connection.info['query_start'].pop()
+
+
+def instrument(app, db):
+    """Per-request query count, DB time, Server-Timing header and access log"""
+    app.config.setdefault('SLOW_QUERY_MS', SLOW_QUERY_MS)
+    app.config.setdefault('SLOW_QUERY_LOG', SLOW_QUERY_LOG)
+    _configure_loggers(app)
+
+    with app.app_context():
+        instrument_engine(db.engine, app)
+        metrics.track_pool(db.engine.pool)
+
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.query_stats = QueryStats()
+
+    # Run before other hooks, which may end the request early with a redirect
+    app.before_request_funcs.setdefault(None, []).insert(0, start_request_timer)
+
+    @app.after_request
+    def add_request_timing(response):
+        if 'query_stats' not in g:
+            return response
+        stats = g.query_stats
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        response.headers.add('Server-Timing', f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries"')
+        if stats.count:
+            response.headers.add('Server-Timing', f'db-slowest;dur={stats.slowest_ms:.2f}')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+        metrics.observe_request(request.endpoint or 'unmatched', request.method,
+                                response.status_code, total_ms / 1000)
+
+        access_log.info(json.dumps({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 2),
+            'queries': stats.count,
+            'db_ms': round(stats.total_ms, 2),
+            'slowest_query_ms': round(stats.slowest_ms, 2),
+            'slowest_query': ' '.join(stats.slowest_statement.split())[:200] if stats.slowest_statement else None,
+        }, ensure_ascii=False))
+        return response
@@ -0,0 +1,308 @@
+# metrics.py
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+# Each process writes its own metrics file here; /metrics merges them all, so
+# the numbers are the same whichever worker process answers the scrape.
+METRICS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'metrics')
+
+# Seconds between writes of this process's metrics file
+FLUSH_INTERVAL = 1.0
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXPORT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+# name -> (type, help, histogram buckets)
+FAMILIES = {
+    'govfunds_http_requests_total': (
+        'counter', 'HTTP requests by endpoint, method and status code.', None),
+    'govfunds_http_request_duration_seconds': (
+        'histogram', 'HTTP request latency by endpoint.', LATENCY_BUCKETS),
+    'govfunds_db_pool_size': (
+        'gauge', 'Configured size of the SQLAlchemy connection pool.', None),
+    'govfunds_db_pool_checked_out': (
+        'gauge', 'Connections currently checked out of the pool.', None),
+    'govfunds_db_pool_overflow': (
+        'gauge', 'Connections open beyond the pool size.', None),
+    'govfunds_json_export_duration_seconds': (
+        'histogram', 'Duration of sync_to_json export runs.', EXPORT_BUCKETS),
+    'govfunds_json_export_rows_total': (
+        'counter', 'Rows written to data/*.json by export runs.', None),
+    'govfunds_json_export_errors_total': (
+        'counter', 'Export runs that failed.', None),
+    'govfunds_uploads_total': (
+        'counter', 'Uploaded files saved.', None),
+    'govfunds_upload_bytes_total': (
+        'counter', 'Bytes of uploaded files saved; rate() gives bytes per second.', None),
+    'govfunds_upload_seconds_total': (
+        'counter', 'Seconds spent receiving and saving uploads.', None),
+    'govfunds_thumbnail_requests_total': (
+        'counter', 'Thumbnail requests by disk cache result (hit or miss).', None),
+    'govfunds_thumbnail_evicted_bytes_total': (
+        'counter', 'Bytes of least recently used thumbnails evicted from the disk cache.', None),
+    'govfunds_upload_gc_deleted_files_total': (
+        'counter', 'Unreferenced uploads and variants deleted by garbage collection.', None),
+    'govfunds_upload_gc_reclaimed_bytes_total': (
+        'counter', 'Bytes freed in the upload folder by garbage collection.', None),
+}
+
+
+# ---------------- PER-PROCESS VALUES ----------------
+_values = {}
+_values_pid = os.getpid()
+_last_flush = 0.0
+_lock = threading.Lock()
+_pool = None
+
+
+def _process_values():
+    global _values, _values_pid
+    if _values_pid != os.getpid():
+        # Forked worker: the parent's numbers are already in the parent's file
+        _values, _values_pid = {}, os.getpid()
+    return _values
+
+
+def _series(name):
+    return _process_values().setdefault(name, {})
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    with _lock:
+        series = _series(name)
+        key = _key(labels)
+        series[key] = series.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    buckets = FAMILIES[name][2]
+    with _lock:
+        series = _series(name)
+        # [count per bucket..., sum, count]; buckets are made cumulative on output
+        counts = series.setdefault(_key(labels), [0] * (len(buckets) + 2))
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        counts[-2] += value
+        counts[-1] += 1
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _series(name)[_key(labels)] = value
+
+
+def observe_request(endpoint, method, status, seconds):
+    inc('govfunds_http_requests_total', endpoint=endpoint, method=method, status=str(status))
+    observe('govfunds_http_request_duration_seconds', seconds, endpoint=endpoint)
+    maybe_flush()
+
+
+def observe_export(seconds, rows, full, failed=False):
+    mode = 'full' if full else 'incremental'
+    observe('govfunds_json_export_duration_seconds', seconds, mode=mode)
+    inc('govfunds_json_export_rows_total', rows, mode=mode)
+    if failed:
+        inc('govfunds_json_export_errors_total', mode=mode)
+    maybe_flush()
+
+
+def observe_upload(nbytes, seconds):
+    inc('govfunds_uploads_total')
+    inc('govfunds_upload_bytes_total', nbytes)
+    inc('govfunds_upload_seconds_total', seconds)
+
+
+def track_pool(pool):
+    """Report this connection pool's gauges whenever metrics are written"""
+    global _pool
+    _pool = pool
+
+
+def _collect_pool():
+    # Only QueuePool has a size and overflow
+    if _pool is None or not hasattr(_pool, 'checkedout'):
+        return
+    set_gauge('govfunds_db_pool_size', _pool.size())
+    set_gauge('govfunds_db_pool_checked_out', _pool.checkedout())
+    set_gauge('govfunds_db_pool_overflow', max(_pool.overflow(), 0))
+
+
+# ---------------- METRICS FILES ----------------
+def _process_path(pid):
+    return os.path.join(METRICS_FOLDER, f"{pid}.json")
+
+
+def _encode(values):
+    return {name: [[list(key), value] for key, value in series.items()]
+            for name, series in values.items()}
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def flush():
+    """Write this process's metrics file"""
+    global _last_flush
+    _collect_pool()
+    with _lock:
+        data = _encode(_process_values())
+        _last_flush = time.monotonic()
+    try:
+        os.makedirs(METRICS_FOLDER, exist_ok=True)
+        _write_json(_process_path(os.getpid()), data)
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
+
+
+def maybe_flush():
+    if time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush()
+
+
+# Keep the last second of counts when the process exits
+atexit.register(flush)
+
+
+@contextmanager
+def _folder_lock():
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(METRICS_FOLDER, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_alive(pid):
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(total, name, key, value):
+    series = total.setdefault(name, {})
+    if key not in series:
+        series[key] = list(value) if isinstance(value, list) else value
+    elif isinstance(value, list):
+        series[key] = [a + b for a, b in zip(series[key], value)]
+    else:
+        series[key] = series[key] + value
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return {name: {tuple(map(tuple, key)): value for key, value in series}
+                for name, series in json.load(f).items()}
+
+
+def collect():
+    """Merge every process's metrics.
+
+    Counters and histograms are summed over all processes, including ones
+    that have exited, whose totals are folded into archive.json. Gauges are
+    summed over live processes only.
+    """
+    flush()
+    total = {}
+    with _folder_lock():
+        archive_path = os.path.join(METRICS_FOLDER, 'archive.json')
+        archive = _read(archive_path) if os.path.exists(archive_path) else {}
+        dead = []
+        for filename in os.listdir(METRICS_FOLDER):
+            pid = filename[:-len('.json')]
+            if not filename.endswith('.json') or not pid.isdigit():
+                continue
+            path = os.path.join(METRICS_FOLDER, filename)
+            try:
+                values = _read(path)
+            except (OSError, ValueError):
+                continue
+            alive = _is_alive(int(pid))
+            for name, series in values.items():
+                if FAMILIES.get(name, ('gauge',))[0] == 'gauge':
+                    if alive:
+                        for key, value in series.items():
+                            _merge(total, name, key, value)
+                    continue
+                for key, value in series.items():
+                    _merge(archive if not alive else total, name, key, value)
+            if not alive:
+                dead.append(path)
+
+        if dead:
+            _write_json(archive_path, _encode(archive))
+            for path in dead:
+                os.remove(path)
+        for name, series in archive.items():
+            for key, value in series.items():
+                _merge(total, name, key, value)
+    return total
+
+
+# ---------------- TEXT EXPOSITION FORMAT ----------------
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    values = collect()
+    lines = []
+    for name, (kind, help_text, buckets) in FAMILIES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for key, value in sorted(values.get(name, {}).items()):
+            if kind != 'histogram':
+                lines.append(f"{name}{_labels(key)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(key, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(key, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{name}_sum{_labels(key)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(key)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
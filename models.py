@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy import Integer, cast, event, func, literal, select, text  # type: ignore
+from sqlalchemy.dialects import postgresql, sqlite  # type: ignore
+from sqlalchemy.orm import attributes, column_property  # type: ignore
+from datetime import date, datetime
 
 db = SQLAlchemy()
 
@@ -9,18 +12,24 @@ class Project(db.Model):
     
     project_name = db.Column(db.String(100), nullable=False)
     project_description = db.Column(db.Text)
-    project_image = db.Column(db.String(255))  # Image filename
+    # Image path under static/; active_history lets upload reference counts move
+    project_image = column_property(db.Column(db.String(255)), active_history=True)
 
-    allocated_budget = db.Column(db.Float, default=0)
-    budget_spent = db.Column(db.Float, default=0)
+    # active_history keeps the old values around so the budget rollup can move
+    allocated_budget = column_property(db.Column(db.Float, default=0), active_history=True)
+    budget_spent = column_property(db.Column(db.Float, default=0), active_history=True)
 
-    project_status = db.Column(db.String(20), default='Planned')
+    project_status = column_property(db.Column(db.String(20), default='Planned'), active_history=True)
 
-    start_date = db.Column(db.Date)
+    start_date = column_property(db.Column(db.Date), active_history=True)
     end_date = db.Column(db.Date)
 
-    region_name = db.Column(db.String(100))
-    sector_name = db.Column(db.String(100))
+    region_name = column_property(db.Column(db.String(100)), active_history=True)
+    sector_name = column_property(db.Column(db.String(100)), active_history=True)
+    
+    # Denormalized report counters, maintained by the ProjectReport events below
+    report_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    unresolved_report_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationship to reports
     reports = db.relationship('ProjectReport', backref='project', lazy=True, cascade='all, delete-orphan')
@@ -35,11 +44,63 @@ class Feedback(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# ---------------- BUDGET ROLLUP TABLE ----------------
+# Project count and budget sums per sector, region, status and start year,
+# maintained by the Project events below so dashboards never scan projects.
+# Missing values are stored as '' (year 0) to be part of the primary key.
+class BudgetRollup(db.Model):
+    sector_name = db.Column(db.String(100), primary_key=True)
+    region_name = db.Column(db.String(100), primary_key=True)
+    project_status = db.Column(db.String(20), primary_key=True)
+    start_year = db.Column(db.Integer, primary_key=True)
+
+    project_count = db.Column(db.Integer, nullable=False, default=0)
+    allocated_total = db.Column(db.Float, nullable=False, default=0)
+    spent_total = db.Column(db.Float, nullable=False, default=0)
+
+
+# ---------------- ANNUAL BUDGET TABLES ----------------
+# National budget per year with its sector and region breakdowns, loaded
+# from CSV by budget_loader.py. payload holds the /api/budget/<year> JSON,
+# built once at load time.
+class AnnualBudget(db.Model):
+    year = db.Column(db.Integer, primary_key=True)
+    total_budget = db.Column(db.Float, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SectorBudget(db.Model):
+    year = db.Column(db.Integer, db.ForeignKey('annual_budget.year', ondelete='CASCADE'), primary_key=True)
+    sector_name = db.Column(db.String(100), primary_key=True)
+    budget = db.Column(db.Float, nullable=False)
+
+
+class RegionBudget(db.Model):
+    year = db.Column(db.Integer, db.ForeignKey('annual_budget.year', ondelete='CASCADE'), primary_key=True)
+    region_name = db.Column(db.String(100), primary_key=True)
+    budget = db.Column(db.Float, nullable=False)
+
+
+# ---------------- UPLOAD BLOB TABLE ----------------
+# One row per file in the content-addressed upload store (see uploads.py),
+# named by its SHA-256. ref_count is the number of project and report rows
+# using it, maintained by the events below; unreferenced blobs are left for
+# garbage collection.
+class UploadBlob(db.Model):
+    filename = db.Column(db.String(100), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
 # ---------------- PROJECT REPORT TABLE ----------------
 class ProjectReport(db.Model):
     report_id = db.Column(db.Integer, primary_key=True)
     
-    project_id = db.Column(db.Integer, db.ForeignKey('project.project_id'), nullable=False)
+    # active_history keeps the old value around so report counters can move
+    project_id = column_property(db.Column(db.Integer, db.ForeignKey('project.project_id'), nullable=False),
+                                 active_history=True)
 
     reporter_name = db.Column(db.String(100))
     reporter_email = db.Column(db.String(100))
@@ -49,7 +110,338 @@ class ProjectReport(db.Model):
 
     report_type = db.Column(db.String(50), default='General')
     
-    report_image = db.Column(db.String(255))  # Image filename
+    # Image filename in static/images/projects
+    report_image = column_property(db.Column(db.String(255)), active_history=True)
 
-    is_resolved = db.Column(db.Boolean, default=False)
+    is_resolved = column_property(db.Column(db.Boolean, default=False), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# ---------------- INDEXES ----------------
+# Secondary indexes for the app's query patterns. Expression indexes must use
+# the same expressions as the queries in app.py for the planner to match them.
+
+# /api/projects sort orders, each with project_id as the keyset tiebreaker
+db.Index('ix_project_name_lower', func.lower(Project.project_name), Project.project_id)
+db.Index('ix_project_start_date', func.coalesce(Project.start_date, date(9999, 12, 31)), Project.project_id)
+db.Index('ix_project_allocated_budget', func.coalesce(Project.allocated_budget, 0), Project.project_id)
+db.Index('ix_project_budget_spent', func.coalesce(Project.budget_spent, 0), Project.project_id)
+db.Index('ix_project_report_count', Project.report_count, Project.project_id)
+
+# Project picker on /feedback: ILIKE '%term%' ordered by trigram distance
+# (pg_trgm), so the top matches are read straight from the index
+db.Index('ix_project_name_trgm', Project.project_name,
+         postgresql_using='gist', postgresql_ops={'project_name': 'gist_trgm_ops'})
+
+# Recent feedback on / and /feedback
+db.Index('ix_feedback_created_at', Feedback.created_at)
+
+# Report feed of one project, newest first, with report_id as the keyset
+# tiebreaker (also serves the foreign key). Reports without a created_at
+# sort as the oldest, so the key never is NULL and keyset comparisons behave.
+REPORT_UNDATED = datetime(1970, 1, 1)
+
+def report_feed_key():
+    return func.coalesce(ProjectReport.created_at, REPORT_UNDATED)
+
+db.Index('ix_project_report_feed_key', ProjectReport.project_id, report_feed_key(), ProjectReport.report_id)
+
+# Unresolved reports on /admin, newest first; resolved reports aren't indexed
+db.Index('ix_project_report_unresolved', ProjectReport.created_at,
+         postgresql_where=(ProjectReport.is_resolved == False))
+
+
+# ---------------- FULL-TEXT SEARCH ----------------
+# /search matches these documents with GIN indexes on the same expressions.
+# Literals are inlined rather than bound so that the expressions in queries
+# are identical to the indexed ones. PostgreSQL only.
+SEARCH_CONFIG = 'english'
+
+def _weighted_tsvector(column, weight):
+    value = func.coalesce(column, text("''"))
+    return func.setweight(func.to_tsvector(text(f"'{SEARCH_CONFIG}'"), value),
+                          text(f"'{weight}'"))
+
+def project_search_vector():
+    """Project name (weight A) and description (weight B)"""
+    return _weighted_tsvector(Project.project_name, 'A').op('||')(
+        _weighted_tsvector(Project.project_description, 'B'))
+
+def report_search_vector():
+    """Report subject (weight A) and message (weight B)"""
+    return _weighted_tsvector(ProjectReport.report_subject, 'A').op('||')(
+        _weighted_tsvector(ProjectReport.report_message, 'B'))
+
+db.Index('ix_project_search', project_search_vector(),
+         postgresql_using='gin').ddl_if(dialect='postgresql')
+db.Index('ix_project_report_search', report_search_vector(),
+         postgresql_using='gin').ddl_if(dialect='postgresql')
+
+
+# ---------------- REPORT COUNTERS ----------------
+# Counters are adjusted with relative UPDATEs (count = count + 1) in the same
+# transaction as the report change, so concurrent writers can't lose updates.
+# Bulk Query.update()/delete() calls bypass these events; run
+# recount_project_reports() after changing reports that way.
+
+def _adjust_report_counts(connection, project_id, total, unresolved):
+    if project_id is None or (total == 0 and unresolved == 0):
+        return
+    table = Project.__table__
+    connection.execute(table.update().where(table.c.project_id == project_id).values(
+        report_count=table.c.report_count + total,
+        unresolved_report_count=table.c.unresolved_report_count + unresolved
+    ))
+
+
+def _previous_value(instance, key):
+    history = attributes.get_history(instance, key)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(instance, key)
+
+
+@event.listens_for(ProjectReport, 'after_insert')
+def _count_new_report(mapper, connection, report):
+    _adjust_report_counts(connection, report.project_id, 1, 0 if report.is_resolved else 1)
+
+
+@event.listens_for(ProjectReport, 'after_update')
+def _count_changed_report(mapper, connection, report):
+    old_project_id = _previous_value(report, 'project_id')
+    old_resolved = _previous_value(report, 'is_resolved')
+    if old_project_id == report.project_id and bool(old_resolved) == bool(report.is_resolved):
+        return
+    _adjust_report_counts(connection, old_project_id, -1, 0 if old_resolved else -1)
+    _adjust_report_counts(connection, report.project_id, 1, 0 if report.is_resolved else 1)
+
+
+@event.listens_for(ProjectReport, 'after_delete')
+def _count_deleted_report(mapper, connection, report):
+    _adjust_report_counts(connection, _previous_value(report, 'project_id'), -1,
+                          0 if _previous_value(report, 'is_resolved') else -1)
+
+
+def recount_project_reports():
+    """Recompute every project's report counters from the report table.
+
+    Runs in the current transaction; the caller commits.
+    """
+    reports = ProjectReport.__table__
+    table = Project.__table__
+    total = select(func.count(reports.c.report_id)).where(
+        reports.c.project_id == table.c.project_id
+    ).scalar_subquery()
+    unresolved = select(func.count(reports.c.report_id)).where(
+        reports.c.project_id == table.c.project_id,
+        reports.c.is_resolved == False
+    ).scalar_subquery()
+    db.session.execute(table.update().values(report_count=total, unresolved_report_count=unresolved))
+
+
+# ---------------- BUDGET ROLLUP ----------------
+# Each project write moves its budget between rollup rows with relative
+# upserts in the same transaction, like the report counters above. Bulk
+# Query.update()/delete() calls and COPY loads bypass these events; run
+# rebuild_budget_rollup() after changing projects that way.
+
+def _rollup_row(project, previous=False):
+    value = (lambda key: _previous_value(project, key)) if previous else (lambda key: getattr(project, key))
+    start_date = value('start_date')
+    key = {
+        'sector_name': value('sector_name') or '',
+        'region_name': value('region_name') or '',
+        'project_status': value('project_status') or '',
+        'start_year': start_date.year if start_date else 0,
+    }
+    return key, value('allocated_budget') or 0, value('budget_spent') or 0
+
+
+def _adjust_rollup(connection, key, count, allocated, spent):
+    table = BudgetRollup.__table__
+    insert = postgresql.insert if connection.dialect.name == 'postgresql' else sqlite.insert
+    stmt = insert(table).values(**key, project_count=count, allocated_total=allocated, spent_total=spent)
+    connection.execute(stmt.on_conflict_do_update(index_elements=list(key), set_={
+        'project_count': table.c.project_count + stmt.excluded.project_count,
+        'allocated_total': table.c.allocated_total + stmt.excluded.allocated_total,
+        'spent_total': table.c.spent_total + stmt.excluded.spent_total,
+    }))
+    if count < 0:
+        connection.execute(table.delete().where(
+            *[table.c[name] == value for name, value in key.items()],
+            table.c.project_count <= 0
+        ))
+
+
+@event.listens_for(Project, 'after_insert')
+def _rollup_new_project(mapper, connection, project):
+    key, allocated, spent = _rollup_row(project)
+    _adjust_rollup(connection, key, 1, allocated, spent)
+
+
+@event.listens_for(Project, 'after_update')
+def _rollup_changed_project(mapper, connection, project):
+    old = _rollup_row(project, previous=True)
+    new = _rollup_row(project)
+    if old == new:
+        return
+    _adjust_rollup(connection, old[0], -1, -old[1], -old[2])
+    _adjust_rollup(connection, new[0], 1, new[1], new[2])
+
+
+@event.listens_for(Project, 'after_delete')
+def _rollup_deleted_project(mapper, connection, project):
+    key, allocated, spent = _rollup_row(project, previous=True)
+    _adjust_rollup(connection, key, -1, -allocated, -spent)
+
+
+def rebuild_budget_rollup():
+    """Recompute the budget rollup from the project table.
+
+    Runs in the current transaction; the caller commits. On PostgreSQL the
+    rollup stays locked against project writes until then, so none are lost.
+    """
+    table = BudgetRollup.__table__
+    projects = Project.__table__
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text("LOCK TABLE budget_rollup IN EXCLUSIVE MODE"))
+    db.session.execute(table.delete())
+    # Inline literals, so GROUP BY matches the selected expressions
+    keys = [
+        func.coalesce(projects.c.sector_name, text("''")),
+        func.coalesce(projects.c.region_name, text("''")),
+        func.coalesce(projects.c.project_status, text("''")),
+        func.coalesce(cast(func.extract('year', projects.c.start_date), Integer), text('0')),
+    ]
+    db.session.execute(table.insert().from_select(
+        ['sector_name', 'region_name', 'project_status', 'start_year',
+         'project_count', 'allocated_total', 'spent_total'],
+        select(*keys, func.count(),
+               func.coalesce(func.sum(projects.c.allocated_budget), text('0')),
+               func.coalesce(func.sum(projects.c.budget_spent), text('0')))
+        .group_by(*keys)
+    ))
+
+
+# ---------------- UPLOAD REFERENCES ----------------
+# Project.project_image holds a static path ('images/projects/<blob>'),
+# ProjectReport.report_image the bare blob filename. Images saved before the
+# upload store have no upload_blob row and are simply not counted. Like the
+# report counters, bulk Query.update()/delete() calls bypass these events;
+# see release_report_images() and recount_upload_refs().
+
+UPLOAD_STATIC_PREFIX = 'images/projects/'
+
+
+def _project_blob(project_image):
+    if project_image and project_image.startswith(UPLOAD_STATIC_PREFIX):
+        return project_image[len(UPLOAD_STATIC_PREFIX):]
+    return None
+
+
+def _adjust_upload_refs(connection, filename, delta):
+    if not filename:
+        return
+    table = UploadBlob.__table__
+    connection.execute(table.update().where(table.c.filename == filename).values(
+        ref_count=table.c.ref_count + delta
+    ))
+
+
+def _move_upload_ref(connection, old, new):
+    if old != new:
+        _adjust_upload_refs(connection, old, -1)
+        _adjust_upload_refs(connection, new, 1)
+
+
+@event.listens_for(Project, 'after_insert')
+def _reference_project_image(mapper, connection, project):
+    _adjust_upload_refs(connection, _project_blob(project.project_image), 1)
+
+
+@event.listens_for(Project, 'after_update')
+def _rereference_project_image(mapper, connection, project):
+    _move_upload_ref(connection, _project_blob(_previous_value(project, 'project_image')),
+                     _project_blob(project.project_image))
+
+
+@event.listens_for(Project, 'after_delete')
+def _release_project_image(mapper, connection, project):
+    _adjust_upload_refs(connection, _project_blob(_previous_value(project, 'project_image')), -1)
+
+
+@event.listens_for(ProjectReport, 'after_insert')
+def _reference_report_image(mapper, connection, report):
+    _adjust_upload_refs(connection, report.report_image, 1)
+
+
+@event.listens_for(ProjectReport, 'after_update')
+def _rereference_report_image(mapper, connection, report):
+    _move_upload_ref(connection, _previous_value(report, 'report_image'), report.report_image)
+
+
+@event.listens_for(ProjectReport, 'after_delete')
+def _release_report_image(mapper, connection, report):
+    _adjust_upload_refs(connection, _previous_value(report, 'report_image'), -1)
+
+
+def register_upload(filename, size):
+    """Record a stored upload, unreferenced until a project or report uses it.
+
+    Runs in the current transaction; the caller commits.
+    """
+    insert = postgresql.insert if db.session.get_bind().dialect.name == 'postgresql' else sqlite.insert
+    db.session.execute(insert(UploadBlob.__table__).values(
+        filename=filename, size=size, ref_count=0, created_at=datetime.utcnow()
+    ).on_conflict_do_nothing(index_elements=['filename']))
+
+
+# Advisory lock key space of upload files, keyed by hashtext(filename)
+UPLOAD_LOCK_SPACE = 4810002
+
+
+def lock_upload(filename, shared=True):
+    """Lock an upload file on every app node until the transaction ends.
+
+    Storing a file takes the lock shared and garbage collection exclusively,
+    so a file isn't deleted while a request that stored it is still open.
+    The exclusive lock is only tried: returns False when it is busy. A no-op
+    outside PostgreSQL.
+    """
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return True
+    params = {'space': UPLOAD_LOCK_SPACE, 'filename': filename}
+    if shared:
+        db.session.execute(text("SELECT pg_advisory_xact_lock_shared(:space, hashtext(:filename))"), params)
+        return True
+    return db.session.execute(text("SELECT pg_try_advisory_xact_lock(:space, hashtext(:filename))"), params).scalar()
+
+
+def release_report_images(project_id):
+    """Drop the references held by a project's reports before a bulk delete"""
+    reports = ProjectReport.__table__
+    table = UploadBlob.__table__
+    uses = select(func.count(reports.c.report_id)).where(
+        reports.c.project_id == project_id,
+        reports.c.report_image == table.c.filename
+    ).scalar_subquery()
+    db.session.execute(table.update().where(
+        table.c.filename.in_(select(reports.c.report_image).where(reports.c.project_id == project_id))
+    ).values(ref_count=table.c.ref_count - uses))
+
+
+def recount_upload_refs():
+    """Recompute every blob's reference count from the image columns.
+
+    Runs in the current transaction; the caller commits.
+    """
+    table = UploadBlob.__table__
+    projects = Project.__table__
+    reports = ProjectReport.__table__
+    project_uses = select(func.count(projects.c.project_id)).where(
+        projects.c.project_image == literal(UPLOAD_STATIC_PREFIX) + table.c.filename
+    ).scalar_subquery()
+    report_uses = select(func.count(reports.c.report_id)).where(
+        reports.c.report_image == table.c.filename
+    ).scalar_subquery()
+    db.session.execute(table.update().values(ref_count=project_uses + report_uses))
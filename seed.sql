@@ -13,7 +13,9 @@ CREATE TABLE project (
     start_date DATE,
     end_date DATE,
     region_name VARCHAR(100),
-    sector_name VARCHAR(100)
+    sector_name VARCHAR(100),
+    report_count INTEGER NOT NULL DEFAULT 0,
+    unresolved_report_count INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE TABLE feedback (
@@ -246,4 +248,9 @@ INSERT INTO project_report (
 (2, 'Ramon Lim', 'ramon@email.com', 'Road Signs Missing', 'Road signage missing on San Miguel Road repairs', 'Issue/Problem', 'images/projects/project1.webp', FALSE, '2025-12-04 14:20:18'),
 (18, 'Lucia Cruz', 'lucia@email.com', 'Stagnant Water', 'Stagnant water breeding mosquito in area', 'Concern', 'images/projects/project1.webp', FALSE, '2025-11-29 12:35:55'),
 (19, 'Erik Reyes', 'erik@email.com', 'Illegal Logging Observed', 'Illegal logging still observed in protected forest', 'General Feedback', 'images/projects/project1.webp', FALSE, '2025-12-01 09:50:26'),
-(20, 'Jenny Tan', 'jenny@email.com', 'Potholes Reappearing', 'Potholes reappearing on main road repairs', 'Issue/Problem', 'images/projects/project1.webp', FALSE, '2025-11-20 15:25:40');
\ No newline at end of file
+(20, 'Jenny Tan', 'jenny@email.com', 'Potholes Reappearing', 'Potholes reappearing on main road repairs', 'Issue/Problem', 'images/projects/project1.webp', FALSE, '2025-11-20 15:25:40');
+
+-- Report counters are normally maintained by the application on write
+UPDATE project p SET
+    report_count = (SELECT COUNT(*) FROM project_report r WHERE r.project_id = p.project_id),
+    unresolved_report_count = (SELECT COUNT(*) FROM project_report r WHERE r.project_id = p.project_id AND NOT r.is_resolved);
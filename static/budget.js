@@ -3,6 +3,9 @@ document.addEventListener('DOMContentLoaded', () => {
     
     let deptChart = null;
     let regChart = null;
+    // Years already fetched from /api/budget/<year>, and the latest request
+    const budgetsByYear = new Map();
+    let pendingRequest = null;
     
     function formatCurrency(amount) {
         return '₱' + amount.toLocaleString();
@@ -20,9 +23,31 @@ document.addEventListener('DOMContentLoaded', () => {
         return colors;
     }
     
-    function updateCharts(year) {
-        const data = BUDGET_DATA[year];
-        if (!data) return;
+    async function loadBudget(year) {
+        if (budgetsByYear.has(year)) return budgetsByYear.get(year);
+        if (pendingRequest) pendingRequest.abort();
+        pendingRequest = new AbortController();
+        const response = await fetch(`/api/budget/${year}`, { signal: pendingRequest.signal });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        budgetsByYear.set(year, data);
+        return data;
+    }
+    
+    async function showYear(year) {
+        try {
+            const data = await loadBudget(year);
+            // Ignore a year the user has already moved away from
+            if (yearSelect && parseInt(yearSelect.value) !== year) return;
+            updateCharts(year, data);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error(`Error loading the ${year} budget:`, error);
+            }
+        }
+    }
+    
+    function updateCharts(year, data) {
         
         // Update annual budget display
         const annualDisplay = document.getElementById('annualBudgetDisplay');
@@ -190,20 +215,14 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
-    // Initialize with default year (2025)
+    // Initialize with the latest year listed in the selector
     const yearSelect = document.getElementById('yearSelect');
-    const initialYear = yearSelect ? parseInt(yearSelect.value) : 2025;
-    
-    // Wait for BUDGET_DATA to be available
-    setTimeout(() => {
-        updateCharts(initialYear);
-    }, 50);
+    if (yearSelect && yearSelect.value) {
+        showYear(parseInt(yearSelect.value));
 
-    // Year selector functionality - update charts without page reload
-    if (yearSelect) {
+        // Year selector functionality - update charts without page reload
         yearSelect.addEventListener('change', function() {
-            const year = parseInt(this.value);
-            updateCharts(year);
+            showYear(parseInt(this.value));
         });
     }
 });
@@ -0,0 +1,130 @@
+// static/project_picker.js
+// Typeahead project picker for the report form on /feedback.
+// Matches come from /api/projects/suggest as the user types; the chosen
+// project's id is kept in a hidden input submitted with the form.
+
+const PICKER_DEBOUNCE_MS = 150;
+
+function initProjectPicker(root) {
+  const input = root.querySelector('.project-picker-input');
+  const valueInput = root.querySelector('input[type=hidden]');
+  const list = root.querySelector('.project-picker-list');
+  const form = root.closest('form');
+  let matches = [];
+  let active = -1;
+  let timer = null;
+  let controller = null;
+
+  function close() {
+    list.hidden = true;
+    input.setAttribute('aria-expanded', 'false');
+    input.removeAttribute('aria-activedescendant');
+    active = -1;
+  }
+
+  function render() {
+    list.innerHTML = '';
+    if (!matches.length) {
+      const empty = document.createElement('li');
+      empty.className = 'project-picker-empty';
+      empty.textContent = 'No matching projects';
+      list.appendChild(empty);
+    }
+    matches.forEach((project, index) => {
+      const item = document.createElement('li');
+      item.id = `projectPickerOption${index}`;
+      item.setAttribute('role', 'option');
+      item.className = 'project-picker-option';
+      if (index === active) {
+        item.classList.add('active');
+        item.setAttribute('aria-selected', 'true');
+        input.setAttribute('aria-activedescendant', item.id);
+      }
+      const name = document.createElement('span');
+      name.textContent = project.project_name;
+      const meta = document.createElement('small');
+      meta.textContent = [project.sector_name || 'N/A', project.region_name]
+        .filter(Boolean)
+        .join(' · ');
+      item.append(name, meta);
+      // mousedown fires before the input's blur closes the list
+      item.addEventListener('mousedown', (e) => {
+        e.preventDefault();
+        choose(index);
+      });
+      list.appendChild(item);
+    });
+    list.hidden = false;
+    input.setAttribute('aria-expanded', 'true');
+  }
+
+  function choose(index) {
+    const project = matches[index];
+    if (!project) return;
+    input.value = project.project_name;
+    valueInput.value = project.project_id;
+    input.setCustomValidity('');
+    close();
+  }
+
+  async function search(term) {
+    if (controller) controller.abort();
+    controller = new AbortController();
+    try {
+      const params = new URLSearchParams({ q: term });
+      const response = await fetch(`/api/projects/suggest?${params}`, {
+        signal: controller.signal,
+      });
+      if (!response.ok) throw new Error(`HTTP ${response.status}`);
+      matches = (await response.json()).projects;
+      active = matches.length ? 0 : -1;
+      render();
+    } catch (error) {
+      if (error.name !== 'AbortError') {
+        console.error('Error loading project suggestions:', error);
+      }
+    }
+  }
+
+  input.addEventListener('input', () => {
+    // Typing invalidates the previous choice
+    valueInput.value = '';
+    clearTimeout(timer);
+    const term = input.value.trim();
+    if (!term) {
+      if (controller) controller.abort();
+      close();
+      return;
+    }
+    timer = setTimeout(() => search(term), PICKER_DEBOUNCE_MS);
+  });
+
+  input.addEventListener('keydown', (e) => {
+    if (list.hidden || !matches.length) return;
+    if (e.key === 'ArrowDown' || e.key === 'ArrowUp') {
+      e.preventDefault();
+      const step = e.key === 'ArrowDown' ? 1 : -1;
+      active = (active + step + matches.length) % matches.length;
+      render();
+    } else if (e.key === 'Enter') {
+      e.preventDefault();
+      choose(active);
+    } else if (e.key === 'Escape') {
+      close();
+    }
+  });
+
+  input.addEventListener('blur', close);
+
+  form.addEventListener('submit', (e) => {
+    if (!valueInput.value) {
+      e.preventDefault();
+      input.setCustomValidity('Please choose a project from the list');
+      input.reportValidity();
+    }
+  });
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  document.querySelectorAll('.project-picker').forEach(initProjectPicker);
+});
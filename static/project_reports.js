@@ -0,0 +1,96 @@
+// static/project_reports.js
+// Report feed on the project details page. Reports are fetched a page at a
+// time from /api/project/<pid>/reports; "Load more" follows next_cursor.
+
+function createReportCard(report) {
+  const card = document.createElement('div');
+  card.className = 'report-card' + (report.resolved ? '' : ' unresolved');
+
+  const header = document.createElement('div');
+  header.className = 'report-header';
+  const heading = document.createElement('div');
+  const subject = document.createElement('h4');
+  subject.textContent = report.subject;
+  const type = document.createElement('span');
+  type.className = `report-type report-type-${report.type.toLowerCase()}`;
+  type.textContent = report.type;
+  heading.append(subject, type);
+  const badge = document.createElement('span');
+  badge.className = report.resolved ? 'resolved-badge' : 'unresolved-badge';
+  badge.textContent = report.resolved ? 'RESOLVED' : 'UNRESOLVED';
+  header.append(heading, badge);
+  card.appendChild(header);
+
+  if (report.image_url) {
+    const imageWrapper = document.createElement('div');
+    imageWrapper.className = 'report-image';
+    const img = document.createElement('img');
+    img.src = report.image_url;
+    img.alt = 'Report image';
+    img.loading = 'lazy';
+    imageWrapper.appendChild(img);
+    card.appendChild(imageWrapper);
+  }
+
+  const message = document.createElement('p');
+  message.className = 'report-message';
+  message.textContent = report.message;
+  card.appendChild(message);
+
+  const meta = document.createElement('div');
+  meta.className = 'report-meta';
+  const reporter = document.createElement('span');
+  reporter.className = 'report-reporter';
+  reporter.textContent = report.reporter;
+  const date = document.createElement('span');
+  date.className = 'report-date';
+  date.textContent = report.created_at;
+  meta.append(reporter, date);
+  card.appendChild(meta);
+  return card;
+}
+
+function initReportFeed(root) {
+  const list = root.querySelector('#reportFeedList');
+  const status = root.querySelector('#reportFeedStatus');
+  const more = root.querySelector('#reportFeedMore');
+  let nextCursor = null;
+  let loading = false;
+
+  async function loadPage() {
+    if (loading) return;
+    loading = true;
+    more.disabled = true;
+    status.hidden = false;
+    status.textContent = 'Loading reports...';
+
+    const params = new URLSearchParams();
+    if (nextCursor) params.set('cursor', nextCursor);
+    try {
+      const response = await fetch(`${root.dataset.url}?${params}`);
+      const data = await response.json();
+      if (!response.ok) throw new Error(data.error || response.statusText);
+
+      data.reports.forEach((report) => list.appendChild(createReportCard(report)));
+      nextCursor = data.next_cursor;
+      more.hidden = !nextCursor;
+      status.hidden = list.children.length > 0;
+      status.textContent = 'No reports yet.';
+    } catch (error) {
+      console.error('Error loading reports:', error);
+      status.textContent = 'Could not load reports. Please try again.';
+      more.hidden = !nextCursor;
+    } finally {
+      loading = false;
+      more.disabled = false;
+    }
+  }
+
+  more.addEventListener('click', loadPage);
+  loadPage();
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+  const feed = document.getElementById('reportFeed');
+  if (feed) initReportFeed(feed);
+});
@@ -2,17 +2,28 @@
 
 let currentProjectId = null;
 let allRegions = [];
+let isAdmin = false;
+
+// Paging state for /api/projects
+let nextCursor = null;
+let hasMoreProjects = true;
+let isLoadingProjects = false;
+let projectsRequestId = 0;
+let searchDebounceTimer = null;
+let cardObserver = null;
 
 // Initialize the projects page
-function initProjectsPage(regions) {
+function initProjectsPage(regions, admin) {
   allRegions = regions;
+  isAdmin = Boolean(admin);
   
-  // Add event listeners to edit buttons
-  document.querySelectorAll('.edit-btn').forEach(btn => {
-    btn.addEventListener('click', function() {
-      const projectId = this.dataset.projectId;
-      openEditModal(parseInt(projectId));
-    });
+  // Edit buttons are created with the cards, so listen on the grid
+  const grid = document.getElementById('projectsGrid');
+  grid.addEventListener('click', function(e) {
+    const btn = e.target.closest('.edit-btn');
+    if (btn) {
+      openEditModal(parseInt(btn.dataset.projectId));
+    }
   });
 
   // Form submit handler
@@ -56,19 +67,27 @@ function initProjectsPage(regions) {
 
   // Initialize scroll animation for project cards
   initScrollAnimation();
+
+  // Load the next page whenever the end of the grid scrolls into view
+  const sentinelObserver = new IntersectionObserver((entries) => {
+    if (entries.some(entry => entry.isIntersecting)) {
+      loadMoreProjects();
+    }
+  }, { rootMargin: '400px' });
+  sentinelObserver.observe(document.getElementById('projectsSentinel'));
+
+  loadMoreProjects();
 }
 
 // Scroll animation for project cards
 function initScrollAnimation() {
-  const cards = document.querySelectorAll('.project-card');
-  
   const observerOptions = {
     root: null,
     rootMargin: '0px',
     threshold: 0.1
   };
 
-  const observer = new IntersectionObserver((entries) => {
+  cardObserver = new IntersectionObserver((entries) => {
     entries.forEach((entry) => {
       if (entry.isIntersecting) {
         // Add visible class when in view
@@ -79,108 +98,159 @@ function initScrollAnimation() {
       }
     });
   }, observerOptions);
+}
 
-  cards.forEach(card => {
-    observer.observe(card);
+// Format a peso amount like the server-side templates do
+function formatAmount(value) {
+  return Number(value || 0).toLocaleString('en-US', {
+    minimumFractionDigits: 2,
+    maximumFractionDigits: 2
   });
 }
 
-// Filter and Sort Projects
-function filterAndSortProjects() {
-  const searchTerm = document.getElementById('searchInput').value.toLowerCase();
-  const sortBy = document.getElementById('sortBy').value;
-  const sortOrder = document.getElementById('sortOrder').value;
-  const statusFilter = document.getElementById('statusFilter').value.toLowerCase();
-  const regionFilter = document.getElementById('regionFilter').value.toLowerCase();
-  const sectorFilter = document.getElementById('sectorFilter').value.toLowerCase();
-  
-  const grid = document.getElementById('projectsGrid');
-  const cards = Array.from(grid.querySelectorAll('.project-card'));
-  
-  // Filter cards
-  let visibleCount = 0;
-  cards.forEach(card => {
-    const name = card.dataset.name || '';
-    const sector = card.dataset.sector || '';
-    const region = card.dataset.region || '';
-    const status = card.dataset.status || '';
-    
-    const matchesSearch = name.includes(searchTerm) || 
-                         sector.includes(searchTerm) || 
-                         region.includes(searchTerm);
-    const matchesStatus = !statusFilter || status === statusFilter;
-    const matchesRegion = !regionFilter || region === regionFilter;
-    const matchesSector = !sectorFilter || sector === sectorFilter;
-    
-    if (matchesSearch && matchesStatus && matchesRegion && matchesSector) {
-      card.style.display = '';
-      visibleCount++;
-    } else {
-      card.style.display = 'none';
-    }
+// Build a project card element from an /api/projects record
+function createProjectCard(p) {
+  const card = document.createElement('div');
+  card.className = 'project-card';
+  card.style.position = 'relative';
+
+  if (isAdmin) {
+    const editBtn = document.createElement('button');
+    editBtn.className = 'edit-btn';
+    editBtn.dataset.projectId = p.id;
+    editBtn.textContent = '✎ Edit';
+    card.appendChild(editBtn);
+  }
+
+  const imageLink = document.createElement('a');
+  imageLink.href = p.detail_url;
+  imageLink.className = 'project-card-image';
+  const img = document.createElement('img');
+  img.src = p.image_url;
+  img.alt = p.name;
+  img.loading = 'lazy';
+  imageLink.appendChild(img);
+  card.appendChild(imageLink);
+
+  const content = document.createElement('div');
+  content.className = 'project-card-content';
+
+  const title = document.createElement('h3');
+  const titleLink = document.createElement('a');
+  titleLink.href = p.detail_url;
+  titleLink.textContent = p.name;
+  title.appendChild(titleLink);
+  content.appendChild(title);
+
+  const location = document.createElement('p');
+  location.className = 'muted';
+  location.textContent = `${p.sector || 'N/A'} — ${p.region || 'N/A'}`;
+  content.appendChild(location);
+
+  const desc = document.createElement('p');
+  desc.className = 'project-desc';
+  desc.textContent = p.description || '-';
+  content.appendChild(desc);
+
+  const meta = document.createElement('div');
+  meta.className = 'project-meta';
+  const allocated = document.createElement('div');
+  allocated.textContent = `Allocated: ₱${formatAmount(p.allocated_budget)}`;
+  const spent = document.createElement('div');
+  spent.textContent = `Spent: ₱${formatAmount(p.spent)}`;
+  const status = document.createElement('div');
+  status.textContent = 'Status: ';
+  const statusValue = document.createElement('strong');
+  statusValue.textContent = p.status;
+  status.appendChild(statusValue);
+  meta.append(allocated, spent, status);
+  content.appendChild(meta);
+
+  card.appendChild(content);
+  return card;
+}
+
+// Current search, filter and sort selections as /api/projects parameters
+function currentProjectQuery() {
+  const params = new URLSearchParams({
+    sort: document.getElementById('sortBy').value,
+    order: document.getElementById('sortOrder').value
   });
-  
-  // Show/hide no results message
-  document.getElementById('noResults').style.display = visibleCount === 0 ? 'block' : 'none';
-  
-  // Sort visible cards
-  const visibleCards = cards.filter(card => card.style.display !== 'none');
-  
-  visibleCards.sort((a, b) => {
-    let aVal, bVal;
-    
-    switch(sortBy) {
-      case 'name':
-        aVal = a.dataset.name || '';
-        bVal = b.dataset.name || '';
-        break;
-      case 'date':
-        aVal = a.dataset.date || '9999-99-99';
-        bVal = b.dataset.date || '9999-99-99';
-        break;
-      case 'budget':
-        aVal = parseFloat(a.dataset.budget) || 0;
-        bVal = parseFloat(b.dataset.budget) || 0;
-        break;
-      case 'spent':
-        aVal = parseFloat(a.dataset.spent) || 0;
-        bVal = parseFloat(b.dataset.spent) || 0;
-        break;
-      case 'reports':
-        aVal = parseInt(a.dataset.reports) || 0;
-        bVal = parseInt(b.dataset.reports) || 0;
-        break;
-      case 'status':
-        aVal = a.dataset.status || '';
-        bVal = b.dataset.status || '';
-        break;
-      case 'region':
-        aVal = a.dataset.region || '';
-        bVal = b.dataset.region || '';
-        break;
-      case 'sector':
-        aVal = a.dataset.sector || '';
-        bVal = b.dataset.sector || '';
-        break;
-      default:
-        aVal = a.dataset.name || '';
-        bVal = b.dataset.name || '';
-    }
-    
-    let comparison = 0;
-    if (typeof aVal === 'number' && typeof bVal === 'number') {
-      comparison = aVal - bVal;
-    } else {
-      comparison = String(aVal).localeCompare(String(bVal));
-    }
-    
-    return sortOrder === 'desc' ? -comparison : comparison;
+  const filters = {
+    q: document.getElementById('searchInput').value.trim(),
+    status: document.getElementById('statusFilter').value,
+    region: document.getElementById('regionFilter').value,
+    sector: document.getElementById('sectorFilter').value
+  };
+  Object.entries(filters).forEach(([key, value]) => {
+    if (value) params.set(key, value);
   });
-  
-  // Reorder DOM
-  visibleCards.forEach(card => grid.appendChild(card));
-  // Append hidden cards at the end
-  cards.filter(card => card.style.display === 'none').forEach(card => grid.appendChild(card));
+  return params;
+}
+
+// Fetch and append the next page of projects
+async function loadMoreProjects() {
+  if (isLoadingProjects || !hasMoreProjects) return;
+  isLoadingProjects = true;
+  const requestId = projectsRequestId;
+  document.getElementById('projectsLoading').style.display = 'block';
+
+  const params = currentProjectQuery();
+  if (nextCursor) params.set('cursor', nextCursor);
+
+  try {
+    const response = await fetch(`/api/projects?${params}`);
+    const data = await response.json();
+    // Ignore pages for a query that has since been replaced
+    if (requestId !== projectsRequestId) return;
+    if (!response.ok) throw new Error(data.error || response.statusText);
+
+    const grid = document.getElementById('projectsGrid');
+    data.projects.forEach(p => {
+      const card = createProjectCard(p);
+      grid.appendChild(card);
+      cardObserver.observe(card);
+    });
+    nextCursor = data.next_cursor;
+    hasMoreProjects = Boolean(data.next_cursor);
+    document.getElementById('noResults').style.display = grid.children.length === 0 ? 'block' : 'none';
+  } catch (error) {
+    console.error('Error loading projects:', error);
+    hasMoreProjects = false;
+  } finally {
+    if (requestId === projectsRequestId) {
+      isLoadingProjects = false;
+      document.getElementById('projectsLoading').style.display = 'none';
+      // Keep loading while the sentinel is still on screen
+      if (hasMoreProjects && isSentinelVisible()) loadMoreProjects();
+    }
+  }
+}
+
+function isSentinelVisible() {
+  const rect = document.getElementById('projectsSentinel').getBoundingClientRect();
+  return rect.top < window.innerHeight + 400;
+}
+
+// Restart the listing from the first page for the current selections
+function reloadProjects() {
+  projectsRequestId++;
+  nextCursor = null;
+  hasMoreProjects = true;
+  isLoadingProjects = false;
+  document.getElementById('projectsGrid').replaceChildren();
+  document.getElementById('noResults').style.display = 'none';
+  loadMoreProjects();
+}
+
+// Filter and Sort Projects (search typing is debounced)
+function filterAndSortProjects(event) {
+  clearTimeout(searchDebounceTimer);
+  if (event && event.type === 'input') {
+    searchDebounceTimer = setTimeout(reloadProjects, 250);
+  } else {
+    reloadProjects();
+  }
 }
 
 // Open edit modal
@@ -209,7 +279,7 @@ async function openEditModal(projectId) {
     const fileName = document.getElementById('editFileName');
     
     if (project.project_image) {
-      imagePreview.src = '/static/' + project.project_image;
+      imagePreview.src = project.project_image_url || '/static/' + project.project_image;
       fileName.textContent = project.project_image.split('/').pop();
       imagePreviewContainer.style.display = 'flex';
       uploadLabel.style.display = 'none';
@@ -0,0 +1,408 @@
+# storage.py
+"""Where uploaded images are kept.
+
+Uploads are addressed by key, a path relative to the store:
+'<sha256>.jpg' for an original and 'variants/<sha256>.jpg.thumb.webp' for
+its resized variants (see images.py). Two backends hold them:
+
+UPLOAD_STORAGE=local (default)
+    Files in static/images/projects on this host, served as static files.
+
+UPLOAD_STORAGE=s3
+    Objects in an S3-compatible bucket (AWS S3, MinIO, ...) shared by every
+    app node, so any node can accept an upload and serve it afterwards.
+    Files are read through a local cache (UPLOAD_CACHE_DIR) that is trimmed
+    to UPLOAD_CACHE_BYTES, least recently used first; browsers get either
+    presigned bucket URLs (S3_PRESIGN_SECONDS > 0) or /uploads/<key>, which
+    serves the cached copy. Needs boto3 and these settings:
+
+        S3_BUCKET          bucket name (required)
+        S3_ENDPOINT_URL    e.g. http://minio:9000; unset for AWS
+        S3_REGION          region name, if the endpoint needs one
+        S3_PREFIX          key prefix inside the bucket, default 'uploads/'
+
+    Credentials come from the usual AWS_ACCESS_KEY_ID/AWS_SECRET_ACCESS_KEY
+    variables or instance profile.
+
+Uploads are first written to the backend's spool_root while the request is
+parsed, then moved into the store with put(); for S3 that is a streamed
+(multipart for large files) upload from the spooled file. For local
+storage the spool folder (UPLOAD_SPOOL_DIR) is outside static/, so spooled
+files and lock files are never served, and should be on the same
+filesystem as the uploads so that keeping a file is a rename.
+"""
+import errno
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import boto3
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 missing: only local storage is available
+    boto3 = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+LOCAL_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'images', 'projects')
+SPOOL_FOLDER = os.getenv(
+    'UPLOAD_SPOOL_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'spool')
+)
+CACHE_FOLDER = os.getenv(
+    'UPLOAD_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'uploads')
+)
+CACHE_MAX_BYTES = int(os.getenv('UPLOAD_CACHE_BYTES', 1024 * 1024 * 1024))
+# Eviction trims down to this share of the budget, so it doesn't run on every miss
+CACHE_LOW_WATER = 0.9
+# Cache hits refresh a file's mtime at most this often (seconds)
+TOUCH_INTERVAL = 60
+# Temp files older than this (seconds) are left over from a crash
+STALE_TMP_SECONDS = 3600
+# Seconds a HEAD result is remembered for rendering URLs
+HEAD_CACHE_TTL = 300
+HEAD_CACHE_SIZE = 10000
+
+
+# Not in every platform's mime.types
+mimetypes.add_type('image/webp', '.webp')
+
+
+def _tmp_path(path):
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def content_type(key):
+    """Content-Type an object is stored with, so the bucket serves it as an image"""
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+
+class LocalStorage:
+    """Files in a folder of this host"""
+
+    remote = False
+
+    def __init__(self, root=LOCAL_FOLDER, spool_root=SPOOL_FOLDER):
+        self.root = root
+        self.local_root = root
+        # Spooled uploads and lock files, outside the static folder
+        self.spool_root = spool_root
+        os.makedirs(root, exist_ok=True)
+        os.makedirs(spool_root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def key_for(self, path):
+        """Key of a file under local_root"""
+        return os.path.relpath(path, self.local_root).replace(os.sep, '/')
+
+    def head(self, key):
+        """(size, mtime) of a stored file, or None"""
+        try:
+            stat = os.stat(self.path(key))
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    cached_head = head
+
+    def put(self, key, path):
+        """Move the local file at path into the store under key"""
+        target = self.path(key)
+        if os.path.abspath(path) == os.path.abspath(target):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(path, target)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # The spool folder is on another filesystem: copy, then rename
+            tmp_path = _tmp_path(target)
+            try:
+                shutil.copyfile(path, tmp_path)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            os.remove(path)
+
+    def touch(self, key):
+        """Mark a file as just stored, for garbage collection's grace period"""
+        os.utime(self.path(key))
+
+    def fetch(self, key):
+        """Local path of a stored file; raises FileNotFoundError"""
+        path = self.path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(key)
+        return path
+
+    def delete(self, keys):
+        for key in keys:
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error deleting upload {key}: {e}")
+
+    def list(self, prefix=''):
+        """(key, size, mtime) of the files directly under prefix ('' or 'variants/')"""
+        folder = self.path(prefix) if prefix else self.root
+        if not os.path.isdir(folder):
+            return
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                yield prefix + entry.name, stat.st_size, stat.st_mtime
+
+
+class S3Storage:
+    """Objects in an S3-compatible bucket, read through a local disk cache"""
+
+    remote = True
+
+    def __init__(self, bucket, prefix='uploads/', endpoint_url=None, region=None,
+                 presign_seconds=0, cache_folder=CACHE_FOLDER, cache_max_bytes=CACHE_MAX_BYTES):
+        if boto3 is None:
+            raise RuntimeError("UPLOAD_STORAGE=s3 needs boto3 (pip install -r requirements-s3.txt)")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.presign_seconds = presign_seconds
+        self.local_root = cache_folder
+        # Spooled uploads go to the cache, where put() keeps them
+        self.spool_root = cache_folder
+        self.cache_max_bytes = cache_max_bytes
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self._client = None
+        self._client_pid = None
+        self._heads = {}
+        self._added = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_folder, exist_ok=True)
+
+    @property
+    def client(self):
+        # Connections don't survive fork(), so each worker process makes its own
+        # client; once created it is safe to share between threads
+        with self._lock:
+            if self._client is None or self._client_pid != os.getpid():
+                options = {'retries': {'max_attempts': 3, 'mode': 'standard'}}
+                if self.endpoint_url:
+                    # MinIO and most other stand-ins don't do virtual-host buckets
+                    options['s3'] = {'addressing_style': 'path'}
+                self._client = boto3.client('s3', endpoint_url=self.endpoint_url,
+                                            region_name=self.region, config=Config(**options))
+                self._client_pid = os.getpid()
+                self._heads = {}
+            return self._client
+
+    def path(self, key):
+        """Cache file of a key"""
+        return os.path.join(self.local_root, *key.split('/'))
+
+    def key_for(self, path):
+        """Key of a file under local_root"""
+        return os.path.relpath(path, self.local_root).replace(os.sep, '/')
+
+    def head(self, key):
+        """(size, mtime) of a stored object, or None"""
+        try:
+            response = self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return response['ContentLength'], response['LastModified'].timestamp()
+
+    def cached_head(self, key):
+        """head() remembered for a while; for rendering URLs, not for decisions"""
+        now = time.time()
+        with self._lock:
+            entry = self._heads.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+        result = self.head(key)
+        with self._lock:
+            if len(self._heads) >= HEAD_CACHE_SIZE:
+                self._heads.clear()
+            self._heads[key] = (now + HEAD_CACHE_TTL, result)
+        return result
+
+    def put(self, key, path):
+        """Upload the local file at path under key; it then becomes the cached copy"""
+        self.client.upload_file(path, self.bucket, self.prefix + key,
+                                ExtraArgs={'ContentType': content_type(key)})
+        target = self.path(key)
+        if os.path.abspath(path) != os.path.abspath(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        with self._lock:
+            self._heads.pop(key, None)
+        self._account(os.path.getsize(target), keep=target)
+
+    def touch(self, key):
+        """Mark an object as just stored, for garbage collection's grace period"""
+        # Copying an object onto itself is the only way to renew LastModified;
+        # REPLACE drops its metadata, so the Content-Type is set again
+        self.client.copy_object(
+            Bucket=self.bucket, Key=self.prefix + key,
+            CopySource={'Bucket': self.bucket, 'Key': self.prefix + key},
+            MetadataDirective='REPLACE', ContentType=content_type(key)
+        )
+
+    def fetch(self, key):
+        """Local path of a stored object, downloaded on a cache miss; raises FileNotFoundError"""
+        path = self.path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            pass
+        else:
+            if time.time() - stat.st_mtime > TOUCH_INTERVAL:
+                os.utime(path)
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = _tmp_path(path)
+        try:
+            self.client.download_file(self.bucket, self.prefix + key, tmp_path)
+            os.replace(tmp_path, path)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise FileNotFoundError(key)
+            raise
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._account(os.path.getsize(path), keep=path)
+        return path
+
+    def delete(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            batch = keys[start:start + 1000]
+            self.client.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': self.prefix + key} for key in batch], 'Quiet': True
+            })
+        for key in keys:
+            with self._lock:
+                self._heads.pop(key, None)
+            try:
+                os.remove(self.path(key))
+            except FileNotFoundError:
+                pass
+
+    def list(self, prefix=''):
+        """(key, size, mtime) of the objects directly under prefix ('' or 'variants/')"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix, Delimiter='/'):
+            for item in page.get('Contents', []):
+                yield item['Key'][len(self.prefix):], item['Size'], item['LastModified'].timestamp()
+
+    def presigned_url(self, key):
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.prefix + key},
+            ExpiresIn=self.presign_seconds
+        )
+
+    # ---------------- READ-THROUGH CACHE ----------------
+    def _account(self, size, keep):
+        with self._lock:
+            self._added += size
+            trim_due = self._added > self.cache_max_bytes * (1 - CACHE_LOW_WATER)
+            if trim_due:
+                self._added = 0
+        if trim_due:
+            self.trim(keep=keep)
+
+    def trim(self, keep=None):
+        """Delete least recently used cache files until the cache fits its budget.
+
+        keep, the file about to be used, is never deleted. Returns the number
+        of bytes reclaimed.
+        """
+        now = time.time()
+        with self._folder_lock():
+            files = []
+            total = 0
+            for root, _, names in os.walk(self.local_root):
+                for name in names:
+                    if name.startswith('.'):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if name.endswith('.tmp'):
+                        # Spooled uploads and downloads in progress, or left by a crash
+                        if now - stat.st_mtime > STALE_TMP_SECONDS:
+                            os.remove(path)
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+            if total <= self.cache_max_bytes:
+                return 0
+
+            reclaimed = 0
+            target = self.cache_max_bytes * CACHE_LOW_WATER
+            for _, size, path in sorted(files):
+                if total - reclaimed <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    reclaimed += size
+                except FileNotFoundError:
+                    pass
+        return reclaimed
+
+    @contextmanager
+    def _folder_lock(self):
+        # One process trims at a time
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.local_root, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def from_env(local_root=LOCAL_FOLDER):
+    """The backend chosen by UPLOAD_STORAGE"""
+    backend = os.getenv('UPLOAD_STORAGE', 'local').lower()
+    if backend == 'local':
+        return LocalStorage(local_root)
+    if backend == 's3':
+        bucket = os.getenv('S3_BUCKET')
+        if not bucket:
+            raise RuntimeError("UPLOAD_STORAGE=s3 needs S3_BUCKET")
+        return S3Storage(
+            bucket,
+            prefix=os.getenv('S3_PREFIX', 'uploads/'),
+            endpoint_url=os.getenv('S3_ENDPOINT_URL') or None,
+            region=os.getenv('S3_REGION') or None,
+            presign_seconds=int(os.getenv('S3_PRESIGN_SECONDS', 0)),
+        )
+    raise RuntimeError(f"Unknown UPLOAD_STORAGE {backend!r}; use local or s3")
@@ -0,0 +1,201 @@
+# thumbnails.py
+"""Resized images generated on first request, kept in a size-bounded disk cache.
+
+/thumbnail/<path>?w=480&format=webp resizes static/images/<path> to at most
+that width. The result is written to CACHE_FOLDER and served from there on
+later requests. The cache is shared by all worker processes. Each file's
+mtime marks its last use, and once the folder grows past CACHE_MAX_BYTES the
+least recently used files are deleted.
+"""
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import metrics
+from images import Image, ImageOps
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+CACHE_FOLDER = os.getenv(
+    'THUMBNAIL_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'thumbnails')
+)
+CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_BYTES', 512 * 1024 * 1024))
+# Eviction trims down to this share of the budget, so it doesn't run on every miss
+CACHE_LOW_WATER = 0.9
+# Hits refresh a file's mtime at most this often (seconds)
+TOUCH_INTERVAL = 60
+THUMBNAIL_THREADS = int(os.getenv('THUMBNAIL_THREADS', 2))
+RENDER_TIMEOUT = 30
+
+# Allowed widths; a fixed set keeps the number of cached variants bounded
+WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+
+# format -> (Pillow format, mimetype, save options)
+FORMATS = {
+    'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'image/png', {'optimize': True}),
+}
+
+
+class InvalidImage(Exception):
+    """The source file could not be decoded as an image"""
+
+
+def render(source, path, width, image_format):
+    """Write source resized to at most width pixels wide to path; returns its size"""
+    pillow_format, _, options = FORMATS[image_format]
+    try:
+        with Image.open(source) as image:
+            image.load()
+            image = ImageOps.exif_transpose(image)
+    except (OSError, SyntaxError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidImage(str(e))
+
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        image.save(tmp_path, format=pillow_format, **options)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return os.path.getsize(path)
+
+
+class ThumbnailCache:
+    def __init__(self, folder=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES, threads=THUMBNAIL_THREADS):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.threads = threads
+        self._executor = None
+        self._executor_pid = None
+        self._inflight = {}
+        self._added = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, source, width, image_format, source_key=None):
+        """Cache file for a variant; a changed source gets a new file.
+
+        source_key names a source whose content never changes, such as an
+        upload's content-addressed storage key. It is used instead of the
+        file's mtime, which a read-through cache refreshes on use.
+        """
+        if source_key is None:
+            stat = os.stat(source)
+            source_key = f"{source}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        key = hashlib.sha1(f"{source_key}\0{width}\0{image_format}".encode()).hexdigest()
+        return os.path.join(self.folder, key[:2], f"{key}.{image_format}")
+
+    def get(self, source, width, image_format, source_key=None):
+        """Path of the cached variant, rendering it first on a miss"""
+        path = self.path_for(source, width, image_format, source_key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self._render(source, path, width, image_format)
+
+        if time.time() - stat.st_mtime > TOUCH_INTERVAL:
+            try:
+                os.utime(path)
+            except FileNotFoundError:  # evicted meanwhile
+                return self._render(source, path, width, image_format)
+        metrics.inc('govfunds_thumbnail_requests_total', result='hit')
+        return path
+
+    def _pool(self):
+        # Threads don't survive fork(), so each worker process starts its own
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='thumbnails')
+            self._executor_pid = os.getpid()
+            self._inflight = {}
+        return self._executor
+
+    def _render(self, source, path, width, image_format):
+        metrics.inc('govfunds_thumbnail_requests_total', result='miss')
+        # Concurrent requests for the same variant wait for one render
+        with self._lock:
+            future = self._inflight.get(path)
+            if future is None:
+                future = self._pool().submit(render, source, path, width, image_format)
+                self._inflight[path] = future
+                future.add_done_callback(lambda _: self._finish(path))
+        size = future.result(timeout=RENDER_TIMEOUT)
+
+        with self._lock:
+            self._added += size
+            trim_due = self._added > self.max_bytes * (1 - CACHE_LOW_WATER)
+            if trim_due:
+                self._added = 0
+        if trim_due:
+            self.trim(keep=path)
+        return path
+
+    def _finish(self, path):
+        with self._lock:
+            self._inflight.pop(path, None)
+
+    def trim(self, keep=None):
+        """Delete least recently used files until the cache fits its budget.
+
+        keep, the file about to be served, is never deleted. Returns the
+        number of bytes reclaimed.
+        """
+        with self._folder_lock():
+            files = []
+            total = 0
+            for root, _, names in os.walk(self.folder):
+                for name in names:
+                    if name.endswith('.tmp') or name == '.lock':
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+            if total <= self.max_bytes:
+                return 0
+
+            reclaimed = 0
+            target = self.max_bytes * CACHE_LOW_WATER
+            for _, size, path in sorted(files):
+                if total - reclaimed <= target:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    reclaimed += size
+                except FileNotFoundError:
+                    pass
+        metrics.inc('govfunds_thumbnail_evicted_bytes_total', reclaimed)
+        return reclaimed
+
+    @contextmanager
+    def _folder_lock(self):
+        # One process trims at a time
+        os.makedirs(self.folder, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.folder, '.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
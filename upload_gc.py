@@ -0,0 +1,291 @@
+# upload_gc.py
+"""Garbage collection of uploaded images nothing refers to any more.
+
+Files stay behind in upload storage (storage.py) when an edit replaces a
+project's photo, when a project and its reports are deleted, or when an
+upload is abandoned mid-request. A collection pass lists the store, and every file
+older than the grace period is looked up, a batch at a time, in the image
+columns of Project and ProjectReport. Unreferenced files are deleted with
+their variants and upload_blob rows; variants whose original is gone are
+deleted too.
+
+The columns are the source of truth, so images saved before the upload
+store (which have no upload_blob row) are collected as well. The grace
+period covers uploads whose project or report hasn't been committed yet;
+storing a file again refreshes its mtime. Files are re-checked and deleted
+under uploads.store_lock(), so a store can't refresh a file that is being
+deleted.
+
+On PostgreSQL each file is also locked cluster-wide before it is deleted
+(models.lock_upload(), an advisory lock that save_upload() holds until its
+row commits) and its references are checked again under that lock. Files
+being stored on any node are skipped and left for a later pass.
+
+Each worker process runs passes on a background thread every
+UPLOAD_GC_INTERVAL seconds and a file lock lets one process per host at a
+time collect. Passes on several hosts sharing a bucket can overlap, and
+then they skip the files each other hold. A pass can also be run by hand:
+
+    python upload_gc.py [--dry-run]
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import select, union  # type: ignore
+from models import db, Project, ProjectReport, UploadBlob, UPLOAD_STATIC_PREFIX, lock_upload
+import images
+import metrics
+import uploads
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+# Files younger than this (seconds) are never collected
+GC_GRACE_SECONDS = int(os.getenv('UPLOAD_GC_GRACE_SECONDS', 24 * 3600))
+# Seconds between passes of the background thread
+GC_INTERVAL = int(os.getenv('UPLOAD_GC_INTERVAL', 3600))
+# Files looked up and deleted per batch; passes pause between batches
+GC_BATCH_SIZE = int(os.getenv('UPLOAD_GC_BATCH_SIZE', 200))
+GC_BATCH_PAUSE = 0.5
+
+LOCK_FILE = '.gc.lock'
+
+
+def _variant_keys(key):
+    return [images.variant_key(key, variant) for variant in images.VARIANTS]
+
+
+def _referenced(filenames):
+    """The filenames among filenames that a project or report uses"""
+    projects = Project.__table__
+    reports = ProjectReport.__table__
+    query = union(
+        select(projects.c.project_image).where(
+            projects.c.project_image.in_([UPLOAD_STATIC_PREFIX + name for name in filenames])
+        ),
+        select(reports.c.report_image).where(reports.c.report_image.in_(filenames))
+    )
+    used = set()
+    for (value,) in db.session.execute(query):
+        if value.startswith(UPLOAD_STATIC_PREFIX):
+            value = value[len(UPLOAD_STATIC_PREFIX):]
+        used.add(value)
+    return used
+
+
+def _remove(storage, filename, cutoff):
+    """Delete an unreferenced file and its variants; returns the bytes freed or None"""
+    # Stores wait until the file is gone and then write it again
+    with uploads.store_lock(storage, shared=False):
+        head = storage.head(filename)
+        if head is None or head[1] >= cutoff:
+            # Gone, or uploaded again while the batch was being checked
+            return None
+        freed = head[0]
+        for key in _variant_keys(filename):
+            variant = storage.head(key)
+            if variant is not None:
+                freed += variant[0]
+        storage.delete([filename] + _variant_keys(filename))
+    return freed
+
+
+def _orphan_variants(storage, originals, cutoff):
+    """Delete variants whose original is not in originals; returns (files, bytes)"""
+    suffixes = tuple(f".{variant}.webp" for variant in images.VARIANTS)
+    orphans = [
+        (key, size) for key, size, mtime in storage.list(images.VARIANT_FOLDER + '/')
+        if key.endswith(suffixes) and mtime < cutoff
+        and key[len(images.VARIANT_FOLDER) + 1:].rsplit('.', 2)[0] not in originals
+    ]
+    if orphans:
+        storage.delete([key for key, _ in orphans])
+    return len(orphans), sum(size for _, size in orphans)
+
+
+def _stale_spools(storage, cutoff):
+    """Delete spooled uploads a crashed request left behind; returns (files, bytes)"""
+    files = freed = 0
+    with os.scandir(storage.spool_root) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.tmp'):
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime < cutoff:
+                    os.remove(entry.path)
+                    files += 1
+                    freed += stat.st_size
+            except FileNotFoundError:
+                pass
+    return files, freed
+
+
+def collect(storage, grace=GC_GRACE_SECONDS, batch_size=GC_BATCH_SIZE, pause=GC_BATCH_PAUSE, dry_run=False):
+    """Run one collection pass over a storage backend; needs an app context.
+
+    Returns {'checked', 'deleted', 'reclaimed_bytes'}. With dry_run nothing is
+    deleted and the counts cover the unreferenced originals only.
+    """
+    cutoff = time.time() - grace
+    originals = set()
+    candidates = []
+    for key, size, mtime in storage.list():
+        originals.add(key)
+        if mtime < cutoff:
+            candidates.append((key, size))
+    candidates.sort()
+    deleted = reclaimed = 0
+    for start in range(0, len(candidates), batch_size):
+        if start and pause:
+            time.sleep(pause)
+        batch = candidates[start:start + batch_size]
+        try:
+            used = _referenced([name for name, _ in batch])
+        finally:
+            # Don't hold a pooled connection while deleting files or pausing
+            db.session.remove()
+        unused = [(name, size) for name, size in batch if name not in used]
+        if dry_run:
+            deleted += len(unused)
+            reclaimed += sum(size for _, size in unused)
+            continue
+
+        try:
+            # Lock the unused files against stores on every node, then look
+            # again: a row committed since the check above keeps its file
+            locked = [name for name, _ in unused if lock_upload(name, shared=False)]
+            used = _referenced(locked) if locked else set()
+            removed = []
+            for name in locked:
+                if name in used:
+                    continue
+                freed = _remove(storage, name, cutoff)
+                if freed is not None:
+                    removed.append(name)
+                    reclaimed += freed
+            if removed:
+                UploadBlob.query.filter(UploadBlob.filename.in_(removed)).delete(synchronize_session=False)
+            # Ends the transaction, releasing the locks
+            db.session.commit()
+            deleted += len(removed)
+        finally:
+            db.session.remove()
+
+    if not dry_run:
+        files, freed = _orphan_variants(storage, originals, cutoff)
+        deleted += files
+        reclaimed += freed
+        if not storage.remote:
+            # The S3 cache removes its own (storage.S3Storage.trim())
+            files, freed = _stale_spools(storage, cutoff)
+            deleted += files
+            reclaimed += freed
+        metrics.inc('govfunds_upload_gc_deleted_files_total', deleted)
+        metrics.inc('govfunds_upload_gc_reclaimed_bytes_total', reclaimed)
+    return {'checked': len(candidates), 'deleted': deleted, 'reclaimed_bytes': reclaimed}
+
+
+class UploadCollector:
+    """Runs collect() on a background thread every interval seconds"""
+
+    def __init__(self, app, storage, interval=GC_INTERVAL):
+        self.app = app
+        self.storage = storage
+        self.interval = interval
+        self.runs = 0
+        self.last_run_at = None
+        self.last_result = None
+        self.last_error = None
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the thread of this process if it isn't running"""
+        if self.interval <= 0:
+            return
+        with self._lock:
+            # Started lazily so no thread exists in a process that forks later
+            if self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='upload-gc', daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            result = self.run()
+            if result and result['deleted']:
+                print(f"✓ Upload GC deleted {result['deleted']} files, "
+                      f"{result['reclaimed_bytes'] / (1024 * 1024):.1f} MB reclaimed")
+
+    def run(self, dry_run=False):
+        """Collect now on the calling thread, unless another process is at it"""
+        with self._folder_lock() as locked:
+            if not locked:
+                return None
+            try:
+                with self.app.app_context():
+                    result = collect(self.storage, dry_run=dry_run)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error collecting uploads: {e}")
+                return None
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.last_result = result
+        return result
+
+    def status(self):
+        """Outcome of the last pass in this process, for monitoring"""
+        return {
+            'runs': self.runs,
+            'last_run_at': self.last_run_at,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'grace_seconds': GC_GRACE_SECONDS,
+            'interval_seconds': self.interval,
+        }
+
+    @contextmanager
+    def _folder_lock(self):
+        # Yields False when another process holds the lock
+        if fcntl is None:
+            yield True
+            return
+        with open(os.path.join(self.storage.spool_root, LOCK_FILE), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def main():
+    args = sys.argv[1:]
+    if args not in ([], ['--dry-run']):
+        print(f"Usage: python {sys.argv[0]} [--dry-run]")
+        sys.exit(2)
+
+    from app import upload_collector
+    result = upload_collector.run(dry_run=bool(args))
+    if result is None:
+        print("✗ Collection failed or another process is collecting")
+        sys.exit(1)
+    verb = 'Would delete' if args else 'Deleted'
+    print(f"✓ {verb} {result['deleted']} of {result['checked']} files past the grace period, "
+          f"{result['reclaimed_bytes'] / (1024 * 1024):.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+# uploads.py
+"""Content-addressed storage for uploaded images.
+
+Uploaded files are written straight to disk, in the storage backend's
+spool_root (see storage.py), as the request body is parsed (app.py plugs
+IncomingUpload into Werkzeug's form parser), hashed and checked against
+image signatures on the way. A file over the
+size limit or that doesn't start like an image aborts the request as soon as
+its first chunks arrive; nothing is buffered in memory.
+
+A kept upload is stored under the key <sha256>.<extension>, the extension
+following its content. Uploading the same photo again, from any form, reuses the
+stored file, so storage grows with unique images only. The upload_blob
+table (models.UploadBlob) counts the project and report rows that
+reference each file.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+import images
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking is available
+    fcntl = None
+
+# Bytes read per chunk when copying a plain stream
+CHUNK_SIZE = 64 * 1024
+
+# Largest upload accepted when no route limit applies
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+# Bytes needed to recognize every signature below
+SIGNATURE_BYTES = 12
+
+# Held shared by store() and exclusively by garbage collection (upload_gc.py)
+LOCK_FILE = '.store.lock'
+
+StoredUpload = namedtuple('StoredUpload', 'filename size created')
+
+
+@contextmanager
+def store_lock(storage, shared=True):
+    """Lock the store of this host against deletes (shared) or stores (exclusive).
+
+    store() checks whether a file exists and refreshes its mtime under a
+    shared lock; garbage collection re-checks a file's age and deletes it
+    under an exclusive one, so a file can't be deleted between the two.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(storage.spool_root, LOCK_FILE), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def sniff_extension(head):
+    """Extension for the image format that head (the first bytes) belongs to, or None"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class IncomingUpload:
+    """Writable, readable file for one uploaded file, spooled in folder.
+
+    Werkzeug's form parser writes the file's chunks here as they arrive.
+    The data is hashed and sized along the way, and the first bytes are
+    checked for an image signature. Unless store() keeps it, the temporary
+    file is removed on close(), which Werkzeug calls at the end of the request.
+    """
+
+    def __init__(self, folder, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(folder, exist_ok=True)
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.extension = None
+        self._head = b''
+        self._digest = hashlib.sha256()
+        # The backend's spool_root, so storing it locally is a rename
+        fd, self.path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        self._file = os.fdopen(fd, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge()
+        if self.extension is None and len(self._head) < SIGNATURE_BYTES:
+            self._head += data[:SIGNATURE_BYTES - len(self._head)]
+            if len(self._head) == SIGNATURE_BYTES:
+                self._check_signature()
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def _check_signature(self):
+        self.extension = sniff_extension(self._head)
+        if self.extension is None:
+            raise UnsupportedMediaType("Please upload a PNG, JPG, GIF or WebP image.")
+
+    def finish(self):
+        """Validate a file shorter than a signature; called once all data is written"""
+        if self.extension is None and self.size:
+            self._check_signature()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def readline(self, size=-1):
+        return self._file.readline(size)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+def store(stream, storage, max_bytes=DEFAULT_MAX_BYTES, lock=None):
+    """Keep an upload in a storage backend under its content hash.
+
+    stream is normally the IncomingUpload the form parser already filled;
+    any other file object is copied in chunks first. Returns
+    StoredUpload(filename, size, created); created is False when an
+    identical file was already stored. Raises UnsupportedMediaType for
+    an empty file or one that isn't an image (images.check_image()), before
+    anything is stored. lock, if given, is called with the filename before
+    the store is checked (app.py passes models.lock_upload).
+    """
+    incoming = stream
+    if not isinstance(stream, IncomingUpload):
+        incoming = IncomingUpload(storage.spool_root, max_bytes)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                incoming.write(chunk)
+        except Exception:
+            incoming.close()
+            raise
+
+    try:
+        incoming.finish()
+        if not incoming.size:
+            raise UnsupportedMediaType("The uploaded image is empty.")
+        incoming.flush()
+        filename = f"{incoming.hexdigest()}.{incoming.extension}"
+        if lock:
+            lock(filename)
+        with store_lock(storage):
+            if storage.head(filename) is not None:
+                # Mark it as new again so garbage collection leaves it alone
+                storage.touch(filename)
+                return StoredUpload(filename, incoming.size, False)
+        error = images.check_image(incoming.path)
+        if error:
+            print(f"Rejected upload: {error}")
+            raise UnsupportedMediaType("Please upload a PNG, JPG, GIF or WebP image.")
+        os.chmod(incoming.path, 0o644)
+        storage.put(filename, incoming.path)
+        return StoredUpload(filename, incoming.size, True)
+    finally:
+        incoming.close()
@@ -0,0 +1,23 @@
+# wsgi.py
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Importing app runs init_db() once, in the gunicorn master when the app is
+preloaded; the forked workers then start with the tables and data in place.
+"""
+from app import app, db
+
+
+def after_fork():
+    """Drop database connections inherited from the parent process.
+
+    A forked worker must not reuse its parent's sockets; close=False leaves
+    them open for the parent and the worker opens its own on first use.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+if __name__ == '__main__':
+    app.run(host='127.0.0.1', port=5000)